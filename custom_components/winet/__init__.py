@@ -1,65 +1,181 @@
 from __future__ import annotations
 
 import logging
-from datetime import timedelta
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .api import WiNetApi, WiNetApiError
+from .api import WiNetApi
 from .const import (
     DOMAIN,
+    DATA_HUB,
+    MODE_LOCAL,
+    MODE_CLOUD,
+    MODE_HYBRID,
     CONF_MODE,
     CONF_HOST,
     CONF_STOVE_ID,
     CONF_SCAN_INTERVAL,
     DEFAULT_SCAN_INTERVAL,
+    CONF_DEDICATED_POOL,
+    DEFAULT_DEDICATED_POOL,
+    CONF_COMMAND_GAP,
+    DEFAULT_COMMAND_GAP,
+    CONF_COMMAND_DEBOUNCE,
+    DEFAULT_COMMAND_DEBOUNCE,
+    CONF_REQUEST_TIMEOUT,
+    DEFAULT_REQUEST_TIMEOUT,
+    CONF_READ_RETRIES,
+    DEFAULT_READ_RETRIES,
+    CONF_COMMAND_RETRIES,
+    DEFAULT_COMMAND_RETRIES,
+    CONF_KEEP_RAW,
+    DEFAULT_KEEP_RAW,
+    CONF_RECORD,
+    DEFAULT_RECORD,
+    RECORDING_DIR,
+    CONF_PELLET_RATES,
+    DEFAULT_PELLET_RATES,
+    CONF_HEAT_RATES,
+    DEFAULT_HEAT_RATES,
+    CONF_CONTROL_LOOP,
 )
+from .coordinator import WiNetCoordinator, budget_store, consumption_store, snapshot_store
+from .discovery import async_setup_rediscovery
+from .hub import WiNetHub
+from .pywinet.capture import PayloadRecorder
 
 LOGGER = logging.getLogger(__name__)
-PLATFORMS = ["sensor", "switch", "number"]
+PLATFORMS = ["sensor", "switch", "number", "climate"]
+# opzioni che cambiano entità o registrazione: richiedono il ricaricamento dell'entry
+RELOAD_OPTIONS = (CONF_KEEP_RAW, CONF_RECORD, CONF_CONTROL_LOOP)
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     mode = entry.data[CONF_MODE]
-    scan_interval = entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+    record = entry.options.get(CONF_RECORD, DEFAULT_RECORD)
+
+    hass.data.setdefault(DOMAIN, {})
+    hub: WiNetHub = hass.data[DOMAIN].get(DATA_HUB)
+    if hub is None:
+        hub = hass.data[DOMAIN][DATA_HUB] = WiNetHub(hass)
+    # prima di qualsiasi await: le altre entry in avvio non devono chiudere l'hub sotto di noi
+    hub.async_reserve(entry.entry_id)
 
     api = WiNetApi(
         hass=hass,
         mode=mode,
         host=entry.data.get(CONF_HOST),
         stove_id=entry.data.get(CONF_STOVE_ID),
+        # le entry cloud usano sempre il pool condiviso dell'hub
+        dedicated_pool=(
+            mode != MODE_CLOUD and entry.data.get(CONF_DEDICATED_POOL, DEFAULT_DEDICATED_POOL)
+        ),
+        keep_raw=record or entry.options.get(CONF_KEEP_RAW, DEFAULT_KEEP_RAW),
+        limiter=hub.limiter,
     )
+    if mode in (MODE_CLOUD, MODE_HYBRID):
+        api.cloud_session = hub.cloud_session()
 
-    async def _async_update_data():
-        try:
-            return await api.get_all()
-        except WiNetApiError as err:
-            raise UpdateFailed(str(err)) from err
-
-    coordinator = DataUpdateCoordinator(
-        hass,
-        LOGGER,
-        name="winet",
-        update_method=_async_update_data,
-        update_interval=timedelta(seconds=scan_interval),
-    )
+    coordinator = WiNetCoordinator(hass, entry.entry_id, api, _scan_interval(entry))
+    _apply_options(entry, api, coordinator)
+    if record:
+        recorder = PayloadRecorder(hass.config.path(RECORDING_DIR, f"{entry.entry_id}.jsonl"))
+        entry.async_on_unload(coordinator.attach_recorder(recorder))
 
-    await coordinator.async_config_entry_first_refresh()
+        async def _async_flush_recorder() -> None:
+            await hass.async_add_executor_job(recorder.flush)
 
-    hass.data.setdefault(DOMAIN, {})
+        entry.async_on_unload(_async_flush_recorder)
+
+    try:
+        if await coordinator.async_restore():
+            # avvio immediato dallo snapshot salvato; il primo poll vero gira in background
+            entry.async_create_background_task(
+                hass, coordinator.async_refresh(), "winet first refresh"
+            )
+        else:
+            await coordinator.async_config_entry_first_refresh()
+    except BaseException:
+        await api.async_close()
+        await _async_release_hub(hass, entry.entry_id)
+        raise
+
+    hub.async_register(entry.entry_id, coordinator)
+    if mode in (MODE_LOCAL, MODE_HYBRID):
+        entry.async_on_unload(async_setup_rediscovery(hass, entry, api))
     hass.data[DOMAIN][entry.entry_id] = {
         "api": api,
         "coordinator": coordinator,
+        "options": dict(entry.options),
     }
+    entry.async_on_unload(entry.add_update_listener(_async_options_updated))
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     return True
 
 
+def _scan_interval(entry: ConfigEntry) -> int:
+    # le opzioni prevalgono sul valore scelto alla creazione dell'entry
+    return entry.options.get(
+        CONF_SCAN_INTERVAL, entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+    )
+
+
+def _apply_options(entry: ConfigEntry, api: WiNetApi, coordinator: WiNetCoordinator) -> None:
+    """Apply the options that can change while the entry is running."""
+    options = entry.options
+    api.request_timeout = options.get(CONF_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT)
+    api.read_retries = options.get(CONF_READ_RETRIES, DEFAULT_READ_RETRIES)
+    api.command_retries = options.get(CONF_COMMAND_RETRIES, DEFAULT_COMMAND_RETRIES)
+    api.set_command_timing(
+        options.get(CONF_COMMAND_GAP, DEFAULT_COMMAND_GAP),
+        options.get(CONF_COMMAND_DEBOUNCE, DEFAULT_COMMAND_DEBOUNCE),
+    )
+    coordinator.consumption.pellet_rates = tuple(
+        options.get(CONF_PELLET_RATES, DEFAULT_PELLET_RATES)
+    )
+    coordinator.consumption.heat_rates = tuple(options.get(CONF_HEAT_RATES, DEFAULT_HEAT_RATES))
+    coordinator.async_set_scan_interval(_scan_interval(entry))
+
+
+async def _async_options_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    data = hass.data[DOMAIN].get(entry.entry_id)
+    if data is None:
+        return
+    previous = data["options"]
+    if any(entry.options.get(key) != previous.get(key) for key in RELOAD_OPTIONS):
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+    # polling, timeout, debounce e tentativi: applicati al volo, senza toccare le entità
+    data["options"] = dict(entry.options)
+    _apply_options(entry, data["api"], data["coordinator"])
+    LOGGER.debug("WiNet: opzioni aggiornate per %s", entry.title)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id, None)
+        data = hass.data[DOMAIN].pop(entry.entry_id, None)
+        if data:
+            await data["coordinator"].async_persist()
+            await data["api"].async_close()
+        await _async_release_hub(hass, entry.entry_id)
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    await snapshot_store(hass, entry.entry_id).async_remove()
+    await budget_store(hass, entry.entry_id).async_remove()
+    await consumption_store(hass, entry.entry_id).async_remove()
+
+
+async def _async_release_hub(hass: HomeAssistant, entry_id: str) -> None:
+    hub: WiNetHub | None = hass.data[DOMAIN].get(DATA_HUB)
+    if hub is None:
+        return
+    hub.async_release(entry_id)
+    if hub.empty:
+        # fuori da hass.data prima di chiuderlo: chi parte adesso ne crea uno nuovo
+        hass.data[DOMAIN].pop(DATA_HUB, None)
+        await hub.async_shutdown()
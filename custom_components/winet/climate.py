@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+from time import monotonic
+from typing import Any
+
+from homeassistant.components.climate import (
+    ClimateEntity,
+    ClimateEntityFeature,
+    HVACAction,
+    HVACMode,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import ATTR_TEMPERATURE, UnitOfTemperature
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.restore_state import RestoreEntity
+
+from .const import DOMAIN, CONF_CONTROL_LOOP, DEFAULT_CONTROL_LOOP
+from .entity import WiNetEntity
+from .pywinet.commands import PARAM_STATUS, PARAM_POWER, PARAM_SET_AIR
+from .pywinet.control import HeatingController, POWER_MIN, POWER_MAX
+
+# preset = livello di potenza
+PRESET_PREFIX = "power_"
+POWER_PRESETS = [f"{PRESET_PREFIX}{level}" for level in range(POWER_MIN, POWER_MAX + 1)]
+
+ATTR_AUTO_TARGET = "auto_target"
+DEFAULT_TARGET = 20.0
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback
+) -> None:
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    api = hass.data[DOMAIN][entry.entry_id]["api"]
+    loop = entry.options.get(CONF_CONTROL_LOOP, DEFAULT_CONTROL_LOOP)
+    async_add_entities([WiNetClimate(coordinator, entry.entry_id, api.mode, loop)])
+
+
+class WiNetClimate(WiNetEntity, ClimateEntity, RestoreEntity):
+    """Stufa come termostato: on/off, temperatura aria e potenza insieme.
+
+    HEAT lascia la regolazione alla stufa (setpoint aria). AUTO usa il
+    termostato interno (``HeatingController``) sulla temperatura letta a
+    ogni poll: nessun poll in più, e scritture solo quando serve cambiare.
+    """
+
+    _attr_name = "WiNet Stove"
+    _attr_temperature_unit = UnitOfTemperature.CELSIUS
+    _attr_target_temperature_step = 1
+    # stesso range dello slider: la stufa accetta solo interi
+    _attr_min_temp = 5
+    _attr_max_temp = 40
+    _attr_hvac_modes = [HVACMode.OFF, HVACMode.HEAT, HVACMode.AUTO]
+    _attr_preset_modes = POWER_PRESETS
+    _attr_supported_features = (
+        ClimateEntityFeature.TARGET_TEMPERATURE
+        | ClimateEntityFeature.PRESET_MODE
+        | ClimateEntityFeature.TURN_ON
+        | ClimateEntityFeature.TURN_OFF
+    )
+    _enable_turn_on_off_backwards_compatibility = False
+    _source_fields = (PARAM_STATUS, "air", PARAM_SET_AIR, PARAM_POWER)
+
+    def __init__(self, coordinator, entry_id: str, mode: str, loop: str):
+        super().__init__(coordinator, entry_id, mode)
+        self._attr_unique_id = f"{entry_id}_climate"
+        self._controller = HeatingController(loop)
+        self._auto = False
+        self._auto_target: float | None = None
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        last = await self.async_get_last_state()
+        if last is None:
+            return
+        # la modalità AUTO e il suo target vivono solo qui: si ripristinano al riavvio
+        self._auto = last.state == HVACMode.AUTO
+        target = last.attributes.get(ATTR_AUTO_TARGET)
+        if target is not None:
+            self._auto_target = float(target)
+
+    @property
+    def hvac_mode(self) -> HVACMode:
+        if self._auto:
+            return HVACMode.AUTO
+        return HVACMode.HEAT if self.coordinator.data.is_on else HVACMode.OFF
+
+    @property
+    def hvac_action(self) -> HVACAction:
+        if self.coordinator.data.is_on:
+            return HVACAction.HEATING
+        return HVACAction.IDLE if self._auto else HVACAction.OFF
+
+    @property
+    def current_temperature(self) -> float | None:
+        return self.coordinator.data.air
+
+    @property
+    def target_temperature(self) -> float | None:
+        if self._auto and self._auto_target is not None:
+            return self._auto_target
+        return self.coordinator.data.setAir
+
+    @property
+    def preset_mode(self) -> str | None:
+        power = self.coordinator.data.power
+        return None if power is None else f"{PRESET_PREFIX}{power}"
+
+    @property
+    def extra_state_attributes(self):
+        attrs = dict(super().extra_state_attributes or {})
+        attrs[ATTR_AUTO_TARGET] = self._auto_target
+        return attrs
+
+    async def async_set_hvac_mode(self, hvac_mode: HVACMode) -> None:
+        if hvac_mode == HVACMode.AUTO:
+            if self._auto_target is None:
+                self._auto_target = self.coordinator.data.setAir or DEFAULT_TARGET
+            if not self._auto:
+                self._auto = True
+                self._controller.reset()
+            await self._async_send(self._control_changes())
+        else:
+            self._auto = False
+            await self._async_send({PARAM_STATUS: hvac_mode == HVACMode.HEAT})
+        self.async_write_ha_state()
+
+    async def async_turn_on(self) -> None:
+        await self.async_set_hvac_mode(HVACMode.HEAT)
+
+    async def async_turn_off(self) -> None:
+        await self.async_set_hvac_mode(HVACMode.OFF)
+
+    async def async_set_temperature(self, **kwargs: Any) -> None:
+        hvac_mode = kwargs.get("hvac_mode")
+        target = None
+        if (temperature := kwargs.get(ATTR_TEMPERATURE)) is not None:
+            target = min(max(float(temperature), self._attr_min_temp), self._attr_max_temp)
+        if hvac_mode == HVACMode.AUTO or (hvac_mode is None and self._auto):
+            # in AUTO il setpoint della stufa è del termostato: cambia solo il target
+            if target is not None:
+                self._auto_target = target
+            await self.async_set_hvac_mode(HVACMode.AUTO)
+            return
+
+        changes: dict[str, Any] = {}
+        if target is not None:
+            changes[PARAM_SET_AIR] = int(round(target))
+        if hvac_mode is not None:
+            self._auto = False
+            changes[PARAM_STATUS] = hvac_mode == HVACMode.HEAT
+        await self._async_send(changes)
+        self.async_write_ha_state()
+
+    async def async_set_preset_mode(self, preset_mode: str) -> None:
+        level = int(preset_mode.removeprefix(PRESET_PREFIX))
+        await self._async_send({PARAM_POWER: level})
+
+    def _control_changes(self) -> dict[str, Any]:
+        data = self.coordinator.data
+        if data is None or data.restored:
+            return {}
+        return self._controller.decide(
+            monotonic(), data.air, self._auto_target, data.state, data.is_on, data.power
+        )
+
+    async def _async_send(self, changes: dict[str, Any]) -> None:
+        """Send only what differs from the stove, as one batch."""
+        data = self.coordinator.data
+        if data is not None:
+            changes = {
+                param: value
+                for param, value in changes.items()
+                if (data.is_on if param == PARAM_STATUS else getattr(data, param)) != value
+            }
+        if changes:
+            self.coordinator.async_submit_many(changes)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        # i valori ottimistici non sono letture: il termostato decide solo sui poll
+        if self._auto and not self.coordinator.patching:
+            changes = self._control_changes()
+            if changes:
+                self.hass.async_create_task(self._async_send(changes))
+        super()._handle_coordinator_update()
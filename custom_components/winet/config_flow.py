@@ -4,38 +4,60 @@ import logging
 import voluptuous as vol
 
 from homeassistant import config_entries
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 
 from .const import (
     DOMAIN,
-    CONF_MODE, MODE_LOCAL, MODE_CLOUD,
-    CONF_HOST, CONF_STOVE_ID,
+    CONF_MODE, MODE_LOCAL, MODE_CLOUD, MODE_HYBRID,
+    CONF_HOST, CONF_STOVE_ID, CONF_MAC,
     CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL,
     CONF_HAS_WATER, DEFAULT_HAS_WATER,
+    CONF_DEDICATED_POOL, DEFAULT_DEDICATED_POOL,
+    CONF_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT,
+    CONF_READ_RETRIES, DEFAULT_READ_RETRIES,
+    CONF_COMMAND_RETRIES, DEFAULT_COMMAND_RETRIES,
+    CONF_COMMAND_GAP, DEFAULT_COMMAND_GAP,
+    CONF_COMMAND_DEBOUNCE, DEFAULT_COMMAND_DEBOUNCE,
+    CONF_PELLET_RATES, DEFAULT_PELLET_RATES,
+    CONF_HEAT_RATES, DEFAULT_HEAT_RATES,
+    CONF_CONTROL_LOOP, DEFAULT_CONTROL_LOOP, LOOP_HYSTERESIS, LOOP_PI,
+    CONF_KEEP_RAW, DEFAULT_KEEP_RAW,
+    CONF_RECORD, DEFAULT_RECORD,
 )
 from .api import WiNetApi, WiNetApiError
+from .discovery import async_discover, async_lookup_mac, configured_hosts
 
 _LOGGER = logging.getLogger(__name__)
 
+MANUAL_HOST = "manual"
+
 
 class WiNetConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> WiNetOptionsFlow:
+        return WiNetOptionsFlow()
+
     def __init__(self) -> None:
         self._mode: str | None = None
+        self._host: str | None = None
+        self._found: list[str] = []
 
     async def async_step_user(self, user_input=None) -> FlowResult:
-        """Step 1: scegli Locale o Cloud."""
+        """Step 1: scegli Locale, Cloud o Ibrida."""
         errors = {}
 
         if user_input is not None:
             self._mode = user_input[CONF_MODE]
-            if self._mode == MODE_LOCAL:
-                return await self.async_step_local()
-            return await self.async_step_cloud()
+            if self._mode == MODE_CLOUD:
+                return await self.async_step_cloud()
+            return await self.async_step_scan()
 
         schema = vol.Schema({
-            vol.Required(CONF_MODE, default=MODE_LOCAL): vol.In([MODE_LOCAL, MODE_CLOUD]),
+            vol.Required(CONF_MODE, default=MODE_LOCAL): vol.In([MODE_LOCAL, MODE_CLOUD, MODE_HYBRID]),
         })
 
         return self.async_show_form(
@@ -44,6 +66,44 @@ class WiNetConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             errors=errors,
         )
 
+    async def async_step_scan(self, user_input=None) -> FlowResult:
+        """Step 2 (Locale/Ibrida): scegli una stufa trovata in LAN o inserisci l'IP."""
+        if user_input is not None:
+            host = user_input[CONF_HOST]
+            self._host = None if host == MANUAL_HOST else host
+            return await self._async_step_host()
+
+        try:
+            found = await async_discover(self.hass)
+        except Exception:
+            _LOGGER.exception("Unexpected error during WiNet discovery")
+            found = {}
+
+        self._found = sorted(set(found) - configured_hosts(self.hass))
+        if not self._found:
+            return await self._async_step_host()
+
+        schema = vol.Schema({
+            vol.Required(CONF_HOST, default=self._found[0]): vol.In(
+                {**{host: host for host in self._found}, MANUAL_HOST: "Manual / Manuale"}
+            ),
+        })
+
+        return self.async_show_form(
+            step_id="scan",
+            data_schema=schema,
+        )
+
+    async def _async_step_host(self) -> FlowResult:
+        if self._mode == MODE_HYBRID:
+            return await self.async_step_hybrid()
+        return await self.async_step_local()
+
+    def _host_field(self):
+        if self._host:
+            return vol.Required(CONF_HOST, default=self._host)
+        return vol.Required(CONF_HOST)
+
     async def async_step_local(self, user_input=None) -> FlowResult:
         """Step 2 (Locale): IP/Host + flag acqua + scan interval."""
         errors = {}
@@ -52,6 +112,7 @@ class WiNetConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             host = user_input[CONF_HOST].strip()
             has_water = user_input.get(CONF_HAS_WATER, DEFAULT_HAS_WATER)
             scan = user_input.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+            dedicated_pool = user_input.get(CONF_DEDICATED_POOL, DEFAULT_DEDICATED_POOL)
 
             api = WiNetApi(
                 hass=self.hass,
@@ -61,6 +122,8 @@ class WiNetConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
             try:
                 await api.get_all()
+                # subito dopo la risposta la voce ARP è fresca: identità per la riscoperta
+                mac = await async_lookup_mac(self.hass, host)
 
             except WiNetApiError:
                 errors["base"] = "cannot_connect"
@@ -75,15 +138,18 @@ class WiNetConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     data={
                         CONF_MODE: MODE_LOCAL,
                         CONF_HOST: host,
+                        CONF_MAC: mac,
                         CONF_HAS_WATER: has_water,
                         CONF_SCAN_INTERVAL: scan,
+                        CONF_DEDICATED_POOL: dedicated_pool,
                     },
                 )
 
         schema = vol.Schema({
-            vol.Required(CONF_HOST): str,
+            self._host_field(): str,
             vol.Optional(CONF_HAS_WATER, default=DEFAULT_HAS_WATER): bool,
             vol.Optional(CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): vol.Coerce(int),
+            vol.Optional(CONF_DEDICATED_POOL, default=DEFAULT_DEDICATED_POOL): bool,
         })
 
         return self.async_show_form(
@@ -139,3 +205,142 @@ class WiNetConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             data_schema=schema,
             errors=errors,
         )
+
+    async def async_step_hybrid(self, user_input=None) -> FlowResult:
+        """Step 2 (Ibrida): IP/Host + stove_id; locale con failover sul cloud."""
+        errors = {}
+
+        if user_input is not None:
+            host = user_input[CONF_HOST].strip()
+            stove_id = user_input[CONF_STOVE_ID].strip()
+            has_water = user_input.get(CONF_HAS_WATER, DEFAULT_HAS_WATER)
+            scan = user_input.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+            dedicated_pool = user_input.get(CONF_DEDICATED_POOL, DEFAULT_DEDICATED_POOL)
+
+            try:
+                # entrambi i percorsi devono funzionare, altrimenti il failover è inutile
+                await WiNetApi(hass=self.hass, mode=MODE_LOCAL, host=host).get_all()
+                mac = await async_lookup_mac(self.hass, host)
+                await WiNetApi(hass=self.hass, mode=MODE_CLOUD, stove_id=stove_id).get_all()
+
+            except WiNetApiError:
+                errors["base"] = "cannot_connect"
+
+            except Exception:
+                _LOGGER.exception("Unexpected error during WiNet hybrid config flow")
+                errors["base"] = "unknown"
+
+            else:
+                return self.async_create_entry(
+                    title="WiNet Stove (Hybrid)",
+                    data={
+                        CONF_MODE: MODE_HYBRID,
+                        CONF_HOST: host,
+                        CONF_MAC: mac,
+                        CONF_STOVE_ID: stove_id,
+                        CONF_HAS_WATER: has_water,
+                        CONF_SCAN_INTERVAL: scan,
+                        CONF_DEDICATED_POOL: dedicated_pool,
+                    },
+                )
+
+        schema = vol.Schema({
+            self._host_field(): str,
+            vol.Required(CONF_STOVE_ID): str,
+            vol.Optional(CONF_HAS_WATER, default=DEFAULT_HAS_WATER): bool,
+            vol.Optional(CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): vol.Coerce(int),
+            vol.Optional(CONF_DEDICATED_POOL, default=DEFAULT_DEDICATED_POOL): bool,
+        })
+
+        return self.async_show_form(
+            step_id="hybrid",
+            data_schema=schema,
+            errors=errors,
+        )
+
+
+def _format_rates(rates) -> str:
+    return ", ".join(f"{rate:g}" for rate in rates)
+
+
+def _parse_rates(value: str) -> list[float]:
+    """Five non-negative values, one per power level, separated by commas."""
+    rates = [float(part) for part in value.replace(";", ",").split(",") if part.strip()]
+    if len(rates) != 5 or any(rate < 0 for rate in rates):
+        raise ValueError(value)
+    return rates
+
+
+class WiNetOptionsFlow(config_entries.OptionsFlow):
+    """Opzioni modificabili senza ricreare l'entry.
+
+    Polling, timeout, tentativi, coda comandi e consumi si applicano al volo
+    (vedi ``_async_options_updated``); registrazione e termostato ricaricano l'entry.
+    """
+
+    async def async_step_init(self, user_input=None) -> FlowResult:
+        errors = {}
+        options = self.config_entry.options
+
+        if user_input is not None:
+            try:
+                user_input[CONF_PELLET_RATES] = _parse_rates(user_input[CONF_PELLET_RATES])
+                user_input[CONF_HEAT_RATES] = _parse_rates(user_input[CONF_HEAT_RATES])
+            except ValueError:
+                errors["base"] = "invalid_rates"
+            else:
+                return self.async_create_entry(title="", data=user_input)
+
+        scan = options.get(
+            CONF_SCAN_INTERVAL,
+            self.config_entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+        )
+        schema = vol.Schema({
+            vol.Required(CONF_SCAN_INTERVAL, default=scan): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=3600)
+            ),
+            vol.Required(
+                CONF_REQUEST_TIMEOUT,
+                default=options.get(CONF_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT),
+            ): vol.All(vol.Coerce(float), vol.Range(min=1, max=60)),
+            vol.Required(
+                CONF_READ_RETRIES,
+                default=options.get(CONF_READ_RETRIES, DEFAULT_READ_RETRIES),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=5)),
+            vol.Required(
+                CONF_COMMAND_RETRIES,
+                default=options.get(CONF_COMMAND_RETRIES, DEFAULT_COMMAND_RETRIES),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=5)),
+            vol.Required(
+                CONF_COMMAND_DEBOUNCE,
+                default=options.get(CONF_COMMAND_DEBOUNCE, DEFAULT_COMMAND_DEBOUNCE),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=60)),
+            vol.Required(
+                CONF_COMMAND_GAP,
+                default=options.get(CONF_COMMAND_GAP, DEFAULT_COMMAND_GAP),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=60)),
+            vol.Required(
+                CONF_PELLET_RATES,
+                default=_format_rates(options.get(CONF_PELLET_RATES, DEFAULT_PELLET_RATES)),
+            ): str,
+            vol.Required(
+                CONF_HEAT_RATES,
+                default=_format_rates(options.get(CONF_HEAT_RATES, DEFAULT_HEAT_RATES)),
+            ): str,
+            vol.Required(
+                CONF_CONTROL_LOOP,
+                default=options.get(CONF_CONTROL_LOOP, DEFAULT_CONTROL_LOOP),
+            ): vol.In([LOOP_PI, LOOP_HYSTERESIS]),
+            vol.Required(
+                CONF_KEEP_RAW, default=options.get(CONF_KEEP_RAW, DEFAULT_KEEP_RAW)
+            ): bool,
+            vol.Required(
+                CONF_RECORD, default=options.get(CONF_RECORD, DEFAULT_RECORD)
+            ): bool,
+        })
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=schema,
+            errors=errors,
+        )
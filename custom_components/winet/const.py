@@ -1,18 +1,100 @@
+# costanti del protocollo: definite nella libreria del client, riesportate qui
+from .pywinet.const import (  # noqa: F401
+    MODE_LOCAL,
+    MODE_CLOUD,
+    MODE_HYBRID,
+    DEFAULT_COMMAND_GAP,
+    DEFAULT_COMMAND_DEBOUNCE,
+    DEFAULT_REQUEST_TIMEOUT,
+    FIELD_DEADBANDS,
+    LOOP_HYSTERESIS,
+    LOOP_PI,
+    STATUS_CODE_OFF,
+    STATUS_CODE_ON,
+    STATUS_ON_CODES,
+    STATUS_MAP_LOCAL,
+    STATUS_MAP_CLOUD,
+)
+
 DOMAIN = "winet"
 
 CONF_MODE = "mode"
-MODE_LOCAL = "local"
-MODE_CLOUD = "cloud"
 
-CONF_HOST = "host"         # per locale
-CONF_STOVE_ID = "stove_id" # per cloud
+CONF_HOST = "host"         # per locale / ibrida
+CONF_STOVE_ID = "stove_id" # per cloud / ibrida
+CONF_MAC = "mac"           # locale / ibrida: identità della stufa per la riscoperta
 CONF_SCAN_INTERVAL = "scan_interval"
 
 CONF_HAS_WATER = "has_water"
 DEFAULT_HAS_WATER = False
 
+# debug: conserva il payload grezzo nello snapshot (diagnostica)
+CONF_KEEP_RAW = "keep_raw"
+DEFAULT_KEEP_RAW = False
+# registrazione dei payload grezzi e dei comandi (JSONL a rotazione)
+CONF_RECORD = "record_payloads"
+DEFAULT_RECORD = False
+RECORDING_DIR = "winet_recordings"
+
+# pool di connessioni keep-alive dedicato alla singola stufa
+CONF_DEDICATED_POOL = "dedicated_pool"
+DEFAULT_DEDICATED_POOL = False
+
 DEFAULT_SCAN_INTERVAL = 15
 
+# ultimo snapshot valido salvato su disco, per avviare senza attendere la stufa
+STORAGE_VERSION = 1
+# ritardo dei salvataggi di snapshot e consumi (quelli in sospeso HA li scrive all'arresto)
+SNAPSHOT_SAVE_INTERVAL = 300
+# storico in memoria: campioni per stufa e finestre dei sensori derivati (secondi)
+HISTORY_SIZE = 2048
+FLUE_TREND_WINDOW = 600
+AIR_TREND_WINDOW = 1800
+ON_TIME_WINDOW = 86400
+
+# consumo stimato per livello di potenza 1..5: pellet (kg/h) e calore (kW)
+CONF_PELLET_RATES = "pellet_rates"
+DEFAULT_PELLET_RATES = (0.8, 1.1, 1.4, 1.7, 2.0)
+CONF_HEAT_RATES = "heat_rates"
+DEFAULT_HEAT_RATES = (3.4, 4.7, 6.0, 7.3, 8.6)
+
+# termostato interno dell'entità climate (modalità AUTO)
+CONF_CONTROL_LOOP = "control_loop"
+DEFAULT_CONTROL_LOOP = LOOP_PI
+
+# ritardo di salvataggio dei contatori di scrittura dopo un comando
+BUDGET_SAVE_DELAY = 30
+
+# hub di polling condiviso tra tutte le stufe
+DATA_HUB = "hub"
+MAX_CONCURRENT_REQUESTS = 8
+
+# coda comandi: distanza minima tra due scritture e debounce dei setpoint (secondi)
+CONF_COMMAND_GAP = "command_gap"
+CONF_COMMAND_DEBOUNCE = "command_debounce"
+
+# richieste HTTP: timeout (secondi) e tentativi extra su timeout / errore di rete
+CONF_REQUEST_TIMEOUT = "request_timeout"
+CONF_READ_RETRIES = "read_retries"
+DEFAULT_READ_RETRIES = 0
+CONF_COMMAND_RETRIES = "command_retries"
+DEFAULT_COMMAND_RETRIES = 0
+
+# Polling adattivo (secondi): veloce nelle fasi transitorie, lento a stufa ferma,
+# "burst" dopo un comando non confermato dalla lettura mirata, per vedere in fretta lo stato vero
+FAST_SCAN_INTERVAL = 5
+IDLE_SCAN_INTERVAL = 180
+BURST_SCAN_INTERVAL = 3
+BURST_DURATION = 30
+
+FAST_POLL_STATES = {"ATTESA FIAMMA", "PULIZIA FINALE", "PULIZIA BRACIERE", "ALARM"}
+IDLE_POLL_STATES = {"SPENTO", "STAND-BY"}
+
+# campi letti a ogni poll anche senza entità che li mostrino:
+# stato (intervallo di polling, storico on/off) e potenza (consumi)
+CORE_FIELDS = ("status", "power")
+
 MANUFACTURER = "WiNet"
 MODEL_LOCAL = "WiNet (Local API)"
 MODEL_CLOUD = "WiNet (Cloud API)"
+MODEL_HYBRID = "WiNet (Local + Cloud API)"
@@ -0,0 +1,410 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import Counter
+from time import monotonic
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .api import WiNetApi, WiNetApiError
+from .const import (
+    DOMAIN,
+    STORAGE_VERSION,
+    SNAPSHOT_SAVE_INTERVAL,
+    BUDGET_SAVE_DELAY,
+    HISTORY_SIZE,
+    ON_TIME_WINDOW,
+    DEFAULT_PELLET_RATES,
+    DEFAULT_HEAT_RATES,
+    STATUS_ON_CODES,
+    FAST_SCAN_INTERVAL,
+    IDLE_SCAN_INTERVAL,
+    BURST_SCAN_INTERVAL,
+    BURST_DURATION,
+    FIELD_DEADBANDS,
+    CORE_FIELDS,
+    FAST_POLL_STATES,
+    IDLE_POLL_STATES,
+)
+from .pywinet.capture import PayloadRecorder
+from .pywinet.commands import PARAM_STATUS
+from .pywinet.consumption import MAX_INTEGRATION_GAP, ConsumptionMeter
+from .pywinet.history import OnTimeWindow, SampleHistory
+from .pywinet.snapshot import FieldTracker, WiNetSnapshot, status_code, translate_status
+
+if TYPE_CHECKING:
+    from .hub import WiNetHub
+
+LOGGER = logging.getLogger(__package__)
+
+
+class WiNetCoordinator(DataUpdateCoordinator):
+    """Coordinator con intervallo di polling adattato allo stato della stufa.
+
+    Non si schedula da solo: i refresh periodici li lancia ``WiNetHub``,
+    che legge ``poll_interval`` dopo ogni aggiornamento.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        api: WiNetApi,
+        scan_interval: int,
+        pellet_rates: tuple[float, ...] = DEFAULT_PELLET_RATES,
+        heat_rates: tuple[float, ...] = DEFAULT_HEAT_RATES,
+    ) -> None:
+        super().__init__(
+            hass,
+            LOGGER,
+            name="winet",
+            update_interval=None,
+        )
+        self.api = api
+        self.scan_interval = scan_interval
+        self.scheduler: WiNetHub | None = None
+        self._burst_until = 0.0
+        self._last_state: str | None = None
+        # scritture non ancora confermate: valore scritto (status come acceso/spento,
+        # tradotto nel codice dello snapshot che lo mostra) e valore da ripristinare
+        # insieme al trasporto da cui è stato letto
+        self._optimistic: dict[str, Any] = {}
+        # un comando è stato eseguito: il prossimo poll non può riusare una lettura già partita
+        self._needs_fresh = False
+        self._rollback: dict[str, tuple[str, Any]] = {}
+        # change detection: campi cambiati nell'ultimo aggiornamento (None = tutti)
+        self.changed_fields: set[str] | None = None
+        # True mentre si notificano valori scritti o verificati, non un poll
+        self.patching = False
+        self._tracker = FieldTracker(FIELD_DEADBANDS)
+        self._published_success: bool | None = None
+        self._published_restored = False
+        # campi letti dalle entità aggiunte (le disabilitate non arrivano mai qui)
+        self._field_users: Counter[str] = Counter()
+        # campioni recenti per i sensori di tendenza (solo letture vere, non ripristini)
+        self.history = SampleHistory(HISTORY_SIZE)
+        # ore di funzionamento sulle 24 h: lo storico a campioni copre molto meno
+        self.on_time = OnTimeWindow(ON_TIME_WINDOW)
+        self._store: Store = snapshot_store(hass, entry_id)
+        self._budget_store: Store = budget_store(hass, entry_id)
+        self.consumption = ConsumptionMeter(
+            pellet_rates,
+            heat_rates,
+            # un poll saltato si integra ancora; un'interruzione lunga no
+            max_gap=max(MAX_INTEGRATION_GAP, 2 * scan_interval),
+        )
+        self._consumption_store: Store = consumption_store(hass, entry_id)
+        self.recorder: PayloadRecorder | None = None
+        self._recorder_writing = False
+        api.commands.add_listener(self._async_command_done)
+
+    async def _async_update_data(self) -> WiNetSnapshot:
+        start = monotonic()
+        fresh, self._needs_fresh = self._needs_fresh, False
+        try:
+            data = await self.api.get_all(fresh)
+        except WiNetApiError as err:
+            self._last_state = None
+            if self.recorder is not None:
+                self.recorder.record_error(self.api.transport, err)
+                self._async_write_recorder()
+            raise UpdateFailed(str(err)) from err
+
+        if self.recorder is not None:
+            self.recorder.record_poll(data.mode, data.raw, monotonic() - start)
+            self._async_write_recorder()
+        self.history.append(data)
+        self.on_time.append(data.is_on)
+        # salvataggi differiti: Store li accorpa e HA scrive quelli in sospeso alla chiusura
+        if self.consumption.update(data):
+            self._consumption_store.async_delay_save(
+                self.consumption.to_storage, SNAPSHOT_SAVE_INTERVAL
+            )
+
+        # un poll arrivato prima della conferma non deve far "rimbalzare" lo slider
+        if self._optimistic:
+            for param in self._optimistic:
+                self._rollback[param] = (data.mode, getattr(data, param))
+            data = data.replace(**self._as_fields(self._optimistic, data.mode))
+
+        self._last_state = data.state
+        self._store.async_delay_save(self._snapshot_to_store, SNAPSHOT_SAVE_INTERVAL)
+        return data
+
+    async def async_restore(self) -> bool:
+        """Load the persisted state; True if a snapshot was restored.
+
+        The write budget counts and consumption totals are restored as
+        well, and the last saved
+        snapshot lets entities start before the first poll.
+        """
+        budget = await self._budget_store.async_load()
+        if budget:
+            self.api.budget.load(budget)
+        consumption = await self._consumption_store.async_load()
+        if consumption:
+            self.consumption.load(consumption)
+
+        stored = await self._store.async_load()
+        if not stored:
+            return False
+        try:
+            snapshot = WiNetSnapshot.from_storage(stored)
+        except (KeyError, TypeError):
+            LOGGER.debug("WiNet: snapshot salvato non valido, ignorato")
+            return False
+        self._last_state = snapshot.state
+        self.async_set_updated_data(snapshot)
+        return True
+
+    async def async_persist(self) -> None:
+        """Save the running totals now (on unload)."""
+        await self._consumption_store.async_save(self.consumption.to_storage())
+        await self._budget_store.async_save(self.api.budget.to_storage())
+
+    @callback
+    def attach_recorder(self, recorder: PayloadRecorder) -> CALLBACK_TYPE:
+        """Record polls and command results; return the detach callback."""
+        self.recorder = recorder
+        remove_listener = self.api.commands.add_listener(recorder.record_command)
+
+        @callback
+        def _detach() -> None:
+            remove_listener()
+            self.recorder = None
+
+        return _detach
+
+    @callback
+    def _async_write_recorder(self) -> None:
+        if self._recorder_writing or not self.recorder.pending:
+            return
+        # una scrittura alla volta: quel che arriva nel frattempo va alla prossima
+        self._recorder_writing = True
+        self.hass.async_create_background_task(
+            self._async_write_lines(self.recorder, self.recorder.drain()),
+            "winet recorder",
+        )
+
+    async def _async_write_lines(self, recorder: PayloadRecorder, lines: list[str]) -> None:
+        try:
+            await self.hass.async_add_executor_job(recorder.write, lines)
+        except OSError as err:
+            LOGGER.warning("WiNet: scrittura della registrazione non riuscita: %s", err)
+        finally:
+            self._recorder_writing = False
+
+    @callback
+    def _snapshot_to_store(self) -> dict[str, Any]:
+        return self.data.to_storage() if self.data is not None else {}
+
+    @callback
+    def async_set_scan_interval(self, scan_interval: int) -> None:
+        """Change the base polling interval while running."""
+        self.scan_interval = scan_interval
+        self.consumption.max_gap = max(MAX_INTEGRATION_GAP, 2 * scan_interval)
+        if self.scheduler is not None:
+            self.scheduler.async_reschedule(self)
+
+    @property
+    def poll_interval(self) -> float:
+        """Seconds until the next poll, given the last state and burst window."""
+        return self._next_interval(self._last_state)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        self.changed_fields = self._diff_fields()
+        super().async_update_listeners()
+
+    @callback
+    def async_require_fields(self, fields: tuple[str, ...]) -> CALLBACK_TYPE:
+        """Ask for ``fields`` in every poll; return the callback releasing them.
+
+        The API then reads and decodes only these, plus ``CORE_FIELDS``:
+        fields no enabled entity shows are not fetched at all.
+        """
+        self._field_users.update(fields)
+        self._sync_wanted_fields()
+
+        @callback
+        def _release() -> None:
+            self._field_users.subtract(fields)
+            self._sync_wanted_fields()
+
+        return _release
+
+    @callback
+    def _sync_wanted_fields(self) -> None:
+        wanted = frozenset(CORE_FIELDS).union(
+            name for name, users in self._field_users.items() if users > 0
+        )
+        if wanted != self.api.wanted_fields:
+            LOGGER.debug("WiNet: campi letti a ogni poll: %s", sorted(wanted))
+            self.api.wanted_fields = wanted
+
+    def fields_changed(self, fields: tuple[str, ...]) -> bool:
+        """True if an entity reading ``fields`` must write its state."""
+        if not fields or self.changed_fields is None:
+            return True
+        return not self.changed_fields.isdisjoint(fields)
+
+    def _diff_fields(self) -> set[str] | None:
+        restored = self.data is not None and self.data.restored
+        if (
+            self.last_update_success != self._published_success
+            or restored != self._published_restored
+        ):
+            # cambio di disponibilità o fine del ripristino: aggiornano tutte le entità
+            self._published_success = self.last_update_success
+            self._published_restored = restored
+            self._tracker.reset()
+        # prima lettura e cambio di trasporto (failover ibrido) li gestisce il tracker
+        return self._tracker.diff(self.data)
+
+    @callback
+    def async_note_command(self) -> None:
+        """Passa al polling "burst" per un po' dopo un comando non confermato."""
+        self._burst_until = monotonic() + BURST_DURATION
+        if self.scheduler is not None:
+            self.scheduler.async_reschedule(self)
+
+    @callback
+    def async_submit(self, param: str, value: Any, wait: bool = False) -> asyncio.Future | None:
+        """Show the written value at once and queue the command to the stove."""
+        self._async_apply_optimistic({param: value})
+        return self.api.commands.submit(param, value, wait=wait)
+
+    @callback
+    def async_submit_many(self, values: dict[str, Any], wait: bool = False) -> asyncio.Future | None:
+        """Like ``async_submit`` for several parameters sent as one batch."""
+        self._async_apply_optimistic(values)
+        return self.api.commands.submit_batch(values, wait=wait)
+
+    @callback
+    def _async_apply_optimistic(self, values: dict[str, Any]) -> None:
+        if self.data is not None:
+            for param in values:
+                self._rollback.setdefault(param, (self.data.mode, getattr(self.data, param)))
+        self._optimistic.update(values)
+        self._async_patch(values)
+
+    async def async_write(self, param: str, value: Any) -> None:
+        """Like ``async_submit`` but wait until the stove received the command."""
+        await self.async_submit(param, value, wait=True)
+
+    @staticmethod
+    def _as_fields(
+        values: dict[str, Any], mode: str, source_mode: str | None = None
+    ) -> dict[str, Any]:
+        """Snapshot fields for ``values`` shown in a snapshot of ``mode``.
+
+        A written status (on/off) becomes the code of ``mode``'s table; a
+        status read over ``source_mode`` is translated into that table.
+        """
+        fields = dict(values)
+        if PARAM_STATUS in fields:
+            status = fields[PARAM_STATUS]
+            if isinstance(status, bool):
+                fields[PARAM_STATUS] = status_code(mode, status)
+            elif source_mode is not None:
+                fields[PARAM_STATUS] = translate_status(status, source_mode, mode)
+        return fields
+
+    @callback
+    def _async_patch(self, values: dict[str, Any], source_mode: str | None = None) -> None:
+        """Show ``values`` without touching availability or the poll schedule.
+
+        Not ``async_set_updated_data``: that would mark a stove that is not
+        answering as available again and postpone the next refresh.
+        """
+        if self.data is None:
+            return
+        fields = self._as_fields(values, self.data.mode, source_mode)
+        self.data = self.data.replace(**fields)
+        self.patching = True
+        try:
+            self.async_update_listeners()
+        finally:
+            self.patching = False
+
+    @callback
+    def _async_command_done(self, param: str, value: Any, error: Exception | None) -> None:
+        self._needs_fresh = True
+        if error is None:
+            self._budget_store.async_delay_save(self.api.budget.to_storage, BUDGET_SAVE_DELAY)
+        if self.api.commands.is_pending(param):
+            # segue già un'altra scrittura dello stesso parametro
+            return
+        if error is not None:
+            # esito incerto (es. timeout dopo l'invio): il burst mostra lo stato vero
+            self._async_rollback(param)
+            self.async_note_command()
+            return
+        # il burst serve solo se la lettura mirata non conferma la scrittura
+        self.hass.async_create_task(self._async_verify(param))
+
+    @callback
+    def _async_rollback(self, param: str) -> None:
+        self._optimistic.pop(param, None)
+        if param in self._rollback:
+            mode, value = self._rollback.pop(param)
+            self._async_patch({param: value}, mode)
+
+    async def _async_verify(self, param: str) -> None:
+        """Confirm a write with a single targeted read instead of a full refresh."""
+        try:
+            mode, actual = await self.api.read_field(param)
+        except WiNetApiError as err:
+            LOGGER.debug("WiNet: verifica di %s non riuscita: %s", param, err)
+            self._optimistic.pop(param, None)
+            self._rollback.pop(param, None)
+            self.async_note_command()
+            await self.async_request_refresh()
+            return
+
+        if self.api.commands.is_pending(param):
+            return
+
+        expected = self._optimistic.pop(param, None)
+        self._rollback.pop(param, None)
+        if param == PARAM_STATUS:
+            confirmed = (actual in STATUS_ON_CODES[mode]) == expected
+        else:
+            confirmed = _same_value(actual, expected)
+        if not confirmed:
+            LOGGER.debug("WiNet: %s letto %s invece di %s, ripristino", param, actual, expected)
+            self.async_note_command()
+        self._async_patch({param: actual}, mode)
+
+    def _next_interval(self, label: str | None) -> float:
+        if monotonic() < self._burst_until:
+            return min(BURST_SCAN_INTERVAL, self.scan_interval)
+
+        if label in FAST_POLL_STATES:
+            return min(FAST_SCAN_INTERVAL, self.scan_interval)
+        if label in IDLE_POLL_STATES:
+            return max(IDLE_SCAN_INTERVAL, self.scan_interval)
+        return self.scan_interval
+
+
+def snapshot_store(hass: HomeAssistant, entry_id: str) -> Store:
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.snapshot")
+
+
+def budget_store(hass: HomeAssistant, entry_id: str) -> Store:
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.write_budget")
+
+
+def consumption_store(hass: HomeAssistant, entry_id: str) -> Store:
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.consumption")
+
+
+def _same_value(a: Any, b: Any) -> bool:
+    try:
+        return abs(float(a) - float(b)) < 1e-6
+    except (TypeError, ValueError):
+        return a == b
@@ -3,7 +3,7 @@ from __future__ import annotations
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 
-from .const import DOMAIN
+from .const import DOMAIN, DATA_HUB, MODE_LOCAL
 
 
 async def async_get_config_entry_diagnostics(
@@ -13,10 +13,37 @@ async def async_get_config_entry_diagnostics(
     data = hass.data[DOMAIN][config_entry.entry_id]
     coordinator = data["coordinator"]
     api = data["api"]
+    hub = hass.data[DOMAIN][DATA_HUB]
 
     return {
         "mode": api.mode,
+        "transport": api.transport,
         "host": getattr(api, "host", None),
         "has_water": config_entry.data.get("has_water", False),
-        "last_data": coordinator.data,
+        "dedicated_pool": api.dedicated_pool,
+        "connections": api.stats.as_dict() if api.dedicated_pool else None,
+        # pool cloud condiviso: i contatori sono di tutte le entry, non di questa stufa
+        "hub_cloud_connections": hub.cloud_stats.as_dict() if api.mode != MODE_LOCAL else None,
+        "polling": hub.slot_info(config_entry.entry_id),
+        "settings": {
+            "scan_interval": coordinator.scan_interval,
+            "request_timeout": api.request_timeout,
+            "read_retries": api.read_retries,
+            "command_retries": api.command_retries,
+            "command_gap": api.command_gap,
+            "command_debounce": api.command_debounce,
+        },
+        "commands": api.commands.stats(),
+        "history_samples": len(coordinator.history),
+        "write_budget": api.budget.as_dict(),
+        "metrics": api.metrics.as_dict(),
+        "wanted_fields": None if api.wanted_fields is None else sorted(api.wanted_fields),
+        "single_flight": {name: flight.as_dict() for name, flight in api.flights.items()},
+        "breakers": {name: breaker.as_dict() for name, breaker in api.breakers.items()},
+        "recorder": (
+            {"path": coordinator.recorder.path, "records": coordinator.recorder.records}
+            if coordinator.recorder is not None
+            else None
+        ),
+        "last_data": coordinator.data.as_dict() if coordinator.data else None,
     }
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import logging
+from datetime import timedelta
+from time import monotonic
+from typing import Any, Callable, Iterable
+
+import aiohttp
+from homeassistant.components import network
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import issue_registry as ir
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import DOMAIN, CONF_HOST, CONF_MAC, MODE_LOCAL
+from .pywinet.breaker import STATE_CLOSED
+
+_LOGGER = logging.getLogger(__name__)
+
+DISCOVERY_CONCURRENCY = 64
+DISCOVERY_TIMEOUT = 1.5
+# sottoreti più grandi vengono ridotte al /24 dell'indirizzo locale
+MIN_PREFIX = 24
+
+# riscoperta in background quando la stufa non risponde più all'IP noto
+REDISCOVERY_CHECK_INTERVAL = 300
+REDISCOVERY_MIN_INTERVAL = 1800
+
+# tabella ARP del kernel: identifica la stufa (MAC) senza campi dedicati nel payload
+ARP_TABLE = "/proc/net/arp"
+ARP_FLAG_COMPLETE = 0x2
+
+
+async def async_probe(
+    session: aiohttp.ClientSession,
+    host: str,
+    timeout: float = DISCOVERY_TIMEOUT,
+) -> dict[str, Any] | None:
+    """Return the /api/global payload if ``host`` answers like a WiNet module."""
+    try:
+        async with session.get(
+            f"http://{host}/api/global",
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as resp:
+            if resp.status != 200:
+                return None
+            data = await resp.json(content_type=None)
+    except (asyncio.TimeoutError, aiohttp.ClientError, ValueError):
+        return None
+    if isinstance(data, dict) and "status" in data and "air" in data:
+        return data
+    return None
+
+
+async def async_scan(
+    session: aiohttp.ClientSession,
+    hosts: Iterable[str],
+    concurrency: int = DISCOVERY_CONCURRENCY,
+    timeout: float = DISCOVERY_TIMEOUT,
+) -> dict[str, dict[str, Any]]:
+    """Probe ``hosts`` concurrently; return the responding stoves by host."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _probe(host: str) -> tuple[str, dict[str, Any] | None]:
+        async with semaphore:
+            return host, await async_probe(session, host, timeout)
+
+    results = await asyncio.gather(*(_probe(host) for host in hosts))
+    return {host: data for host, data in results if data is not None}
+
+
+async def async_local_hosts(hass: HomeAssistant) -> list[str]:
+    """Candidate hosts on the IPv4 subnets of the enabled network adapters."""
+    own: set[ipaddress.IPv4Address] = set()
+    networks: set[ipaddress.IPv4Network] = set()
+    for adapter in await network.async_get_adapters(hass):
+        if not adapter["enabled"]:
+            continue
+        for ip_info in adapter["ipv4"]:
+            address = ipaddress.IPv4Address(ip_info["address"])
+            if address.is_loopback or address.is_link_local:
+                continue
+            own.add(address)
+            prefix = max(ip_info["network_prefix"], MIN_PREFIX)
+            networks.add(ipaddress.IPv4Network(f"{address}/{prefix}", strict=False))
+
+    return [
+        str(host)
+        for net in sorted(networks)
+        for host in net.hosts()
+        if host not in own
+    ]
+
+
+async def async_discover(hass: HomeAssistant) -> dict[str, dict[str, Any]]:
+    hosts = await async_local_hosts(hass)
+    start = monotonic()
+    found = await async_scan(async_get_clientsession(hass), hosts)
+    _LOGGER.debug(
+        "WiNet: scansione di %s host in %.1fs, trovate %s stufe",
+        len(hosts), monotonic() - start, len(found),
+    )
+    return found
+
+
+def parse_arp(text: str) -> dict[str, str]:
+    """Map IPv4 address -> MAC from the contents of ``/proc/net/arp``."""
+    table: dict[str, str] = {}
+    for line in text.splitlines()[1:]:
+        parts = line.split()
+        if len(parts) < 4:
+            continue
+        address, _hw_type, flags, mac = parts[:4]
+        try:
+            complete = int(flags, 16) & ARP_FLAG_COMPLETE
+        except ValueError:
+            continue
+        if complete and mac != "00:00:00:00:00:00":
+            table[address] = mac.lower()
+    return table
+
+
+def _read_arp() -> str:
+    with open(ARP_TABLE, encoding="ascii") as arp:
+        return arp.read()
+
+
+async def async_lookup_mac(hass: HomeAssistant, host: str) -> str | None:
+    """MAC of ``host`` from the ARP table (None if unknown or unavailable).
+
+    Only meaningful right after talking to ``host``, while its entry is fresh.
+    """
+    try:
+        text = await hass.async_add_executor_job(_read_arp)
+    except OSError:
+        return None
+    return parse_arp(text).get(host)
+
+
+def configured_hosts(hass: HomeAssistant, exclude_entry_id: str | None = None) -> set[str]:
+    return {
+        entry.data[CONF_HOST]
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.entry_id != exclude_entry_id and entry.data.get(CONF_HOST)
+    }
+
+
+@callback
+def async_setup_rediscovery(hass: HomeAssistant, entry: ConfigEntry, api) -> Callable[[], None]:
+    """Follow a stove that changed IP (DHCP) while its local API is down.
+
+    While the stove answers, its MAC is learnt from the ARP table. The LAN
+    is rescanned at most every ``REDISCOVERY_MIN_INTERVAL`` while the local
+    circuit breaker is not closed. A new address is adopted only when
+    exactly one unclaimed stove answers and has the known MAC; when the
+    identity cannot be checked a repair issue is raised instead.
+    """
+    last_run = 0.0
+    running = False
+    issue_id = f"stove_moved_{entry.entry_id}"
+
+    async def _async_learn_mac() -> None:
+        mac = await async_lookup_mac(hass, api.host)
+        if mac is not None and mac != entry.data.get(CONF_MAC):
+            hass.config_entries.async_update_entry(entry, data={**entry.data, CONF_MAC: mac})
+
+    async def _async_rediscover() -> None:
+        nonlocal running
+        running = True
+        try:
+            found = await async_discover(hass)
+        finally:
+            running = False
+
+        candidates = set(found) - configured_hosts(hass, entry.entry_id) - {api.host}
+        if len(candidates) != 1:
+            if candidates:
+                _LOGGER.warning(
+                    "WiNet: stufa %s non raggiungibile, più candidati trovati: %s",
+                    api.host, sorted(candidates),
+                )
+            return
+
+        new_host = candidates.pop()
+        known_mac = entry.data.get(CONF_MAC)
+        new_mac = await async_lookup_mac(hass, new_host)
+        if known_mac is None or new_mac is None:
+            # non si può verificare che sia la stessa stufa: decide l'utente
+            _LOGGER.warning(
+                "WiNet: stufa %s non raggiungibile, trovata una stufa non verificabile su %s",
+                api.host, new_host,
+            )
+            ir.async_create_issue(
+                hass,
+                DOMAIN,
+                issue_id,
+                is_fixable=False,
+                severity=ir.IssueSeverity.WARNING,
+                translation_key="stove_moved",
+                translation_placeholders={"host": api.host, "new_host": new_host},
+            )
+            return
+        if new_mac != known_mac:
+            _LOGGER.debug("WiNet: %s è un'altra stufa (%s), ignorata", new_host, new_mac)
+            return
+
+        _LOGGER.warning("WiNet: stufa spostata da %s a %s", api.host, new_host)
+        hass.config_entries.async_update_entry(entry, data={**entry.data, CONF_HOST: new_host})
+        api.host = new_host
+        api.breakers[MODE_LOCAL].record_success()
+        ir.async_delete_issue(hass, DOMAIN, issue_id)
+
+    @callback
+    def _async_check(_now) -> None:
+        nonlocal last_run
+        if running:
+            return
+        if api.breakers[MODE_LOCAL].state == STATE_CLOSED:
+            if entry.data.get(CONF_MAC) is None:
+                entry.async_create_background_task(hass, _async_learn_mac(), "winet mac")
+            return
+        if monotonic() - last_run < REDISCOVERY_MIN_INTERVAL:
+            return
+        last_run = monotonic()
+        entry.async_create_background_task(hass, _async_rediscover(), "winet rediscovery")
+
+    return async_track_time_interval(
+        hass, _async_check, timedelta(seconds=REDISCOVERY_CHECK_INTERVAL)
+    )
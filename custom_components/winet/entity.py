@@ -1,13 +1,32 @@
 from __future__ import annotations
 
+from homeassistant.core import callback
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN, MANUFACTURER, MODEL_LOCAL, MODEL_CLOUD
+from .const import (
+    DOMAIN,
+    MANUFACTURER,
+    MODE_LOCAL,
+    MODE_HYBRID,
+    MODEL_LOCAL,
+    MODEL_CLOUD,
+    MODEL_HYBRID,
+)
 
 
 class WiNetEntity(CoordinatorEntity):
-    """Base entity that provides device_info for WiNet."""
+    """Base entity that provides device_info for WiNet.
+
+    ``_source_fields`` lists the coordinator fields the entity reads: the
+    state is written only when one of them changed (empty = always).
+    While the entity is added those fields are fetched at every poll;
+    ``_fetch_fields`` overrides them for entities that update on every
+    poll but still depend on some field (e.g. through the history).
+    """
+
+    _source_fields: tuple[str, ...] = ()
+    _fetch_fields: tuple[str, ...] | None = None
 
     def __init__(self, coordinator, entry_id: str, mode: str, name: str = "WiNet Stove"):
         super().__init__(coordinator)
@@ -15,12 +34,36 @@ class WiNetEntity(CoordinatorEntity):
         self._mode = mode
         self._device_name = name
 
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        fields = self._source_fields if self._fetch_fields is None else self._fetch_fields
+        if fields:
+            self.async_on_remove(self.coordinator.async_require_fields(fields))
+
     @property
     def device_info(self) -> DeviceInfo:
-        model = MODEL_LOCAL if self._mode == "local" else MODEL_CLOUD
+        if self._mode == MODE_LOCAL:
+            model = MODEL_LOCAL
+        elif self._mode == MODE_HYBRID:
+            model = MODEL_HYBRID
+        else:
+            model = MODEL_CLOUD
         return DeviceInfo(
             identifiers={(DOMAIN, self._entry_id)},
             manufacturer=MANUFACTURER,
             model=model,
             name=self._device_name,
         )
+
+    @property
+    def extra_state_attributes(self):
+        """Attributes shared by every entity; overrides merge their own in."""
+        # stato caricato dall'ultimo snapshot salvato, in attesa del primo poll
+        if self.coordinator.data is not None and self.coordinator.data.restored:
+            return {"restored": True}
+        return None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        if self.coordinator.fields_changed(self._source_fields):
+            super()._handle_coordinator_update()
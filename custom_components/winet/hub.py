@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+from dataclasses import dataclass
+from time import monotonic
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+from homeassistant.core import HomeAssistant, callback
+
+from .const import MAX_CONCURRENT_REQUESTS, DEFAULT_REQUEST_TIMEOUT
+from .pywinet.protocol import ConnectionStats, POOL_KEEPALIVE, DNS_CACHE_TTL
+
+if TYPE_CHECKING:
+    from .coordinator import WiNetCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# sequenza a bassa discrepanza: le fasi restano ben distribuite anche
+# quando le entry vengono aggiunte o rimosse
+_GOLDEN = (math.sqrt(5) - 1) / 2
+
+
+@dataclass
+class _Slot:
+    coordinator: WiNetCoordinator
+    phase: float
+    due: float
+    task: asyncio.Task | None = None
+
+
+class WiNetHub:
+    """Polling scheduler shared by every WiNet config entry.
+
+    Each entry gets a phase offset inside its polling interval so that
+    stoves with the same interval do not poll at the same moment. A global
+    semaphore caps the requests in flight and cloud entries share one
+    keep-alive connection pool. An entry reserves its place before using
+    either, so the hub is not torn down while another entry is still
+    setting up.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self.limiter = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self.cloud_stats = ConnectionStats()
+        self._cloud_session: aiohttp.ClientSession | None = None
+        self._slots: dict[str, _Slot] = {}
+        # entry in fase di setup: usano già limite e sessione ma non hanno ancora uno slot
+        self._reserved: set[str] = set()
+        self._registered = 0
+        self._epoch = monotonic()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def empty(self) -> bool:
+        return not self._slots and not self._reserved
+
+    def cloud_session(self) -> aiohttp.ClientSession:
+        if self._cloud_session is None or self._cloud_session.closed:
+            self._cloud_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit_per_host=MAX_CONCURRENT_REQUESTS,
+                    keepalive_timeout=POOL_KEEPALIVE,
+                    ttl_dns_cache=DNS_CACHE_TTL,
+                ),
+                timeout=aiohttp.ClientTimeout(total=DEFAULT_REQUEST_TIMEOUT),
+                trace_configs=[self.cloud_stats.trace_config()],
+            )
+        return self._cloud_session
+
+    @callback
+    def async_reserve(self, entry_id: str) -> None:
+        """Keep the hub alive for an entry that is still setting up."""
+        self._reserved.add(entry_id)
+
+    @callback
+    def async_register(self, entry_id: str, coordinator: WiNetCoordinator) -> None:
+        self._reserved.discard(entry_id)
+        phase = (self._registered * _GOLDEN) % 1.0
+        self._registered += 1
+        slot = _Slot(coordinator=coordinator, phase=phase, due=0.0)
+        slot.due = self._next_due(slot)
+        self._slots[entry_id] = slot
+        coordinator.scheduler = self
+
+        if self._task is None or self._task.done():
+            self._task = self.hass.async_create_background_task(
+                self._run(), name="winet polling hub"
+            )
+        self._wakeup.set()
+
+    @callback
+    def async_release(self, entry_id: str) -> None:
+        """Drop an entry's slot or reservation (``empty`` tells if it was the last)."""
+        self._reserved.discard(entry_id)
+        slot = self._slots.pop(entry_id, None)
+        if slot is not None:
+            slot.coordinator.scheduler = None
+            if slot.task is not None and not slot.task.done():
+                slot.task.cancel()
+        self._wakeup.set()
+
+    async def async_shutdown(self) -> None:
+        """Stop the polling loop and close the shared cloud session."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        if self._cloud_session is not None and not self._cloud_session.closed:
+            await self._cloud_session.close()
+        self._cloud_session = None
+
+    @callback
+    def async_reschedule(self, coordinator: WiNetCoordinator) -> None:
+        """Recompute the next poll after the coordinator interval changed."""
+        for slot in self._slots.values():
+            if slot.coordinator is coordinator and (slot.task is None or slot.task.done()):
+                slot.due = min(slot.due, self._next_due(slot))
+                self._wakeup.set()
+
+    def slot_info(self, entry_id: str) -> dict[str, Any] | None:
+        slot = self._slots.get(entry_id)
+        if slot is None:
+            return None
+        return {
+            "phase": round(slot.phase, 3),
+            "interval": slot.coordinator.poll_interval,
+            "next_poll_in": round(max(slot.due - monotonic(), 0.0), 1),
+            "entries": len(self._slots),
+        }
+
+    def _next_due(self, slot: _Slot) -> float:
+        """First instant after now on this slot's phase-shifted grid."""
+        interval = slot.coordinator.poll_interval
+        origin = self._epoch + slot.phase * interval
+        steps = math.floor((monotonic() - origin) / interval) + 1
+        return origin + steps * interval
+
+    async def _run(self) -> None:
+        while self._slots:
+            now = monotonic()
+            for slot in self._slots.values():
+                if slot.due <= now and (slot.task is None or slot.task.done()):
+                    # ritardo rispetto alla scadenza: misura il carico del loop
+                    slot.coordinator.api.metrics.endpoint("schedule_lag").record(now - slot.due, True)
+                    slot.due = math.inf
+                    slot.task = self.hass.async_create_background_task(
+                        self._refresh(slot), name="winet poll"
+                    )
+
+            next_due = min(slot.due for slot in self._slots.values())
+            timeout = None if math.isinf(next_due) else max(next_due - monotonic(), 0)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _refresh(self, slot: _Slot) -> None:
+        try:
+            await slot.coordinator.async_refresh()
+        finally:
+            slot.due = self._next_due(slot)
+            self._wakeup.set()
@@ -1,7 +1,5 @@
 from __future__ import annotations
 
-import asyncio
-
 from homeassistant.components.number import NumberEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
@@ -10,8 +8,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .const import DOMAIN, CONF_HAS_WATER
 from .entity import WiNetEntity
-
-DEBOUNCE_SECONDS = 2.0
+from .pywinet.commands import PARAM_POWER, PARAM_SET_AIR, PARAM_SET_WATER
 
 
 async def async_setup_entry(
@@ -35,37 +32,23 @@ async def async_setup_entry(
 
 
 class _DebouncedNumberBase(WiNetEntity, NumberEntity):
-    """Base per Number con invio debounced per ridurre scritture su memoria limitata."""
+    """Base per Number: le scritture passano dalla coda comandi della stufa,
+    che fa debounce e accorpamento per ridurre le scritture su memoria limitata."""
+
+    _param: str
 
     def __init__(self, coordinator, entry_id: str, mode: str, api):
         super().__init__(coordinator, entry_id, mode)
         self._api = api
-        self._pending_task: asyncio.Task | None = None
-        self._pending_value: float | None = None
-
-    async def async_will_remove_from_hass(self) -> None:
-        if self._pending_task and not self._pending_task.done():
-            self._pending_task.cancel()
-
-    def _cancel_pending(self) -> None:
-        if self._pending_task and not self._pending_task.done():
-            self._pending_task.cancel()
-
-    async def _debounced_send(self) -> None:
-        try:
-            await asyncio.sleep(DEBOUNCE_SECONDS)
-            final_val = self._pending_value
-            if final_val is None:
-                return
-
-            await self._send_value(final_val)
-            await self.coordinator.async_request_refresh()
 
-        except asyncio.CancelledError:
-            return
-
-    async def _send_value(self, value: float) -> None:
-        raise NotImplementedError
+    def _coerce(self, value: float) -> int:
+        """
+        In scrittura la stufa accetta SOLO interi, nel range dello slider.
+        """
+        v = int(round(float(value)))
+        v = max(v, int(self._attr_native_min_value))
+        v = min(v, int(self._attr_native_max_value))
+        return v
 
     async def async_set_native_value(self, value: float) -> None:
         new_val = float(value)
@@ -78,9 +61,7 @@ class _DebouncedNumberBase(WiNetEntity, NumberEntity):
             except (TypeError, ValueError):
                 pass
 
-        self._pending_value = new_val
-        self._cancel_pending()
-        self._pending_task = asyncio.create_task(self._debounced_send())
+        self.coordinator.async_submit(self._param, self._coerce(new_val))
 
 
 class WiNetSetPowerNumber(_DebouncedNumberBase):
@@ -93,27 +74,16 @@ class WiNetSetPowerNumber(_DebouncedNumberBase):
     _attr_native_max_value = 5
     _attr_native_step = 1
 
+    _param = PARAM_POWER
+    _source_fields = (PARAM_POWER,)
+
     def __init__(self, coordinator, entry_id: str, mode: str, api):
         super().__init__(coordinator, entry_id, mode, api)
         self._attr_unique_id = f"{entry_id}_set_power"
 
     @property
     def native_value(self):
-        val = self.coordinator.data.get("power")
-        if val is None:
-            return None
-        try:
-            return int(float(val))
-        except (TypeError, ValueError):
-            return None
-
-    async def _send_value(self, value: float) -> None:
-        v = int(round(value))
-        if v < 1:
-            v = 1
-        if v > 5:
-            v = 5
-        await self._api.set_power(v)
+        return self.coordinator.data.power
 
 
 class WiNetSetAirTempNumber(_DebouncedNumberBase):
@@ -127,6 +97,9 @@ class WiNetSetAirTempNumber(_DebouncedNumberBase):
     _attr_native_max_value = 40
     _attr_native_step = 1
 
+    _param = PARAM_SET_AIR
+    _source_fields = (PARAM_SET_AIR,)
+
     def __init__(self, coordinator, entry_id: str, mode: str, api):
         super().__init__(coordinator, entry_id, mode, api)
         self._attr_unique_id = f"{entry_id}_set_air_temp"
@@ -138,27 +111,8 @@ class WiNetSetAirTempNumber(_DebouncedNumberBase):
         Può contenere .5 → lo mostriamo ARROTONDATO
         per non far “impazzire” lo slider.
         """
-        val = self.coordinator.data.get("setAir")
-        if val is None:
-            return None
-        try:
-            return int(round(float(val)))
-        except (TypeError, ValueError):
-            return None
-
-    async def _send_value(self, value: float) -> None:
-        """
-        In scrittura la stufa accetta SOLO interi.
-        """
-        v = int(round(float(value)))
-
-        if v < 5:
-            v = 5
-        if v > 40:
-            v = 40
-
-        await self._api.set_air_temperature(v)
-
+        val = self.coordinator.data.setAir
+        return None if val is None else int(round(val))
 
 
 class WiNetSetWaterTempNumber(_DebouncedNumberBase):
@@ -172,6 +126,9 @@ class WiNetSetWaterTempNumber(_DebouncedNumberBase):
     _attr_native_max_value = 80
     _attr_native_step = 1
 
+    _param = PARAM_SET_WATER
+    _source_fields = (PARAM_SET_WATER,)
+
     def __init__(self, coordinator, entry_id: str, mode: str, api):
         super().__init__(coordinator, entry_id, mode, api)
         self._attr_unique_id = f"{entry_id}_set_water_temp"
@@ -183,23 +140,5 @@ class WiNetSetWaterTempNumber(_DebouncedNumberBase):
         Può contenere .5 → lo arrotondiamo
         per mantenere coerente lo slider.
         """
-        val = self.coordinator.data.get("setWater")
-        if val is None:
-            return None
-        try:
-            return int(round(float(val)))
-        except (TypeError, ValueError):
-            return None
-
-    async def _send_value(self, value: float) -> None:
-        """
-        In scrittura la stufa accetta SOLO interi.
-        """
-        v = int(round(float(value)))
-
-        if v < 40:
-            v = 40
-        if v > 80:
-            v = 80
-
-        await self._api.set_water_temperature(v)
+        val = self.coordinator.data.setWater
+        return None if val is None else int(round(val))
@@ -0,0 +1,7 @@
+"""Client WiNet indipendente da Home Assistant.
+
+Protocollo (locale / cloud), decodifica, coda comandi e logiche di supporto
+usate dall'integrazione. Solo ``protocol`` richiede aiohttp; gli altri moduli
+usano la sola libreria standard, così ``tools/`` e i test li importano come
+package ``pywinet`` senza Home Assistant.
+"""
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import random
+from time import monotonic
+from typing import Any
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+# errori di rete consecutivi prima di considerare la stufa offline
+FAILURE_THRESHOLD = 3
+BACKOFF_BASE = 10.0
+BACKOFF_MAX = 300.0
+BACKOFF_JITTER = 0.2
+
+
+class CircuitBreaker:
+    """Fail fast while a stove is unreachable.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    requests are rejected without touching the network. When the backoff
+    expires a single probe is let through (half-open): success closes the
+    circuit, failure reopens it with a doubled, jittered backoff.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        backoff_base: float = BACKOFF_BASE,
+        backoff_max: float = BACKOFF_MAX,
+        jitter: float = BACKOFF_JITTER,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.backoff = backoff_base
+        self.next_probe_at = 0.0
+        self.opened = 0
+        self.rejected = 0
+        self._probing = False
+
+    def allow(self) -> bool:
+        """Return True if a request may go out now."""
+        if self.state == STATE_CLOSED:
+            return True
+        if self.state == STATE_OPEN and monotonic() >= self.next_probe_at:
+            self.state = STATE_HALF_OPEN
+        if self.state == STATE_HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.backoff = self.backoff_base
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == STATE_HALF_OPEN:
+            self._open(self.backoff * 2)
+        elif self.state == STATE_CLOSED and self.failures >= self.failure_threshold:
+            self._open(self.backoff_base)
+
+    def release(self) -> None:
+        """Forget an aborted request (e.g. cancelled) without judging it."""
+        self._probing = False
+
+    def _open(self, backoff: float) -> None:
+        self.state = STATE_OPEN
+        self.opened += 1
+        self._probing = False
+        self.backoff = min(backoff, self.backoff_max)
+        delay = self.backoff * random.uniform(1 - self.jitter, 1 + self.jitter)
+        self.next_probe_at = monotonic() + delay
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "backoff": round(self.backoff, 1),
+            "next_probe_in": (
+                round(max(self.next_probe_at - monotonic(), 0.0), 1)
+                if self.state == STATE_OPEN
+                else None
+            ),
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
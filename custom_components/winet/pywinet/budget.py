@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Any
+
+from .commands import PARAM_STATUS, PARAM_POWER, PARAM_SET_AIR, PARAM_SET_WATER
+
+HOUR = 3600
+DAY = 86400
+
+# scritture ammesse per parametro: (finestra in secondi, massimo) per ogni finestra
+WRITE_BUDGETS: dict[str, tuple[tuple[int, int], ...]] = {
+    PARAM_STATUS: ((HOUR, 6), (DAY, 24)),
+    PARAM_POWER: ((HOUR, 30), (DAY, 200)),
+    PARAM_SET_AIR: ((HOUR, 30), (DAY, 200)),
+    PARAM_SET_WATER: ((HOUR, 30), (DAY, 200)),
+}
+
+# sotto questa frazione di budget residuo le scritture vengono distanziate
+BUDGET_RESERVE = 0.25
+
+
+class WriteBudget:
+    """Rolling per-parameter write counts protecting the stove EEPROM.
+
+    Each parameter has one or more ``(window, limit)`` budgets. With
+    plenty left a write may go out at once. When a window drops under the
+    reserve, writes are spaced ``window / limit`` apart, so that pending
+    values for the same parameter merge in the queue meanwhile. An
+    exhausted window holds writes until its oldest write expires.
+    Timestamps are wall-clock so the counts survive restarts.
+    """
+
+    def __init__(
+        self,
+        limits: dict[str, tuple[tuple[int, int], ...]] = WRITE_BUDGETS,
+        reserve: float = BUDGET_RESERVE,
+    ) -> None:
+        self.limits = limits
+        self.reserve = reserve
+        self._writes: dict[str, deque[float]] = {param: deque() for param in limits}
+
+    def _prune(self, param: str, now: float) -> deque[float]:
+        writes = self._writes[param]
+        horizon = now - max(window for window, _limit in self.limits[param])
+        while writes and writes[0] <= horizon:
+            writes.popleft()
+        return writes
+
+    def _used(self, writes: deque[float], window: int, now: float) -> int:
+        # deque ordinata: si contano le scritture dalla fine
+        count = 0
+        for ts in reversed(writes):
+            if ts <= now - window:
+                break
+            count += 1
+        return count
+
+    def record(self, param: str, now: float | None = None) -> None:
+        if param not in self.limits:
+            return
+        now = time.time() if now is None else now
+        self._prune(param, now).append(now)
+
+    def remaining(self, param: str, now: float | None = None) -> int | None:
+        """Writes left in the tightest window (None for unbudgeted params).
+
+        Never negative: on/off commands are counted but never held, so they
+        can go past the limit.
+        """
+        if param not in self.limits:
+            return None
+        now = time.time() if now is None else now
+        writes = self._prune(param, now)
+        left = min(limit - self._used(writes, window, now) for window, limit in self.limits[param])
+        return max(left, 0)
+
+    def delay(self, param: str, now: float | None = None) -> float:
+        """Seconds a write of ``param`` should still wait (0 = go ahead)."""
+        if param not in self.limits:
+            return 0.0
+        now = time.time() if now is None else now
+        writes = self._prune(param, now)
+        wait = 0.0
+        for window, limit in self.limits[param]:
+            used = self._used(writes, window, now)
+            if used >= limit:
+                # la finestra si libera quando scade la più vecchia scrittura che vi cade
+                oldest = writes[len(writes) - used]
+                wait = max(wait, oldest + window - now)
+            elif limit - used <= limit * self.reserve and writes:
+                wait = max(wait, writes[-1] + window / limit - now)
+        return max(0.0, wait)
+
+    def as_dict(self, now: float | None = None) -> dict[str, Any]:
+        now = time.time() if now is None else now
+        result: dict[str, Any] = {}
+        for param, windows in self.limits.items():
+            writes = self._prune(param, now)
+            result[param] = {
+                f"{window}s": {"used": self._used(writes, window, now), "limit": limit}
+                for window, limit in windows
+            }
+        return result
+
+    def to_storage(self) -> dict[str, Any]:
+        return {"writes": {param: list(writes) for param, writes in self._writes.items()}}
+
+    def load(self, data: dict[str, Any]) -> None:
+        now = time.time()
+        for param, stamps in data.get("writes", {}).items():
+            if param in self._writes and isinstance(stamps, list):
+                self._writes[param] = deque(sorted(float(ts) for ts in stamps))
+                self._prune(param, now)
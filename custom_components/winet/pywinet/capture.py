@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from typing import Any, Iterator
+
+# dimensione di un file di registrazione prima della rotazione
+RECORDER_MAX_BYTES = 5 * 1024 * 1024
+RECORDER_BACKUPS = 3
+
+KIND_POLL = "poll"
+KIND_ERROR = "error"
+KIND_COMMAND = "cmd"
+
+
+class PayloadRecorder:
+    """Append raw stove payloads and command results to a rotating JSONL file.
+
+    ``record_*`` only buffer in memory and are safe to call from the event
+    loop; ``write`` (or ``flush``) does the file I/O and must run in an
+    executor. When the file exceeds ``max_bytes`` it is rotated to
+    ``.1`` … ``.<backups>``.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = RECORDER_MAX_BYTES,
+        backups: int = RECORDER_BACKUPS,
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.records = 0
+        self._buffer: list[str] = []
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._buffer)
+
+    def _append(self, record: dict[str, Any]) -> None:
+        record["t"] = round(time.time(), 3)
+        self._buffer.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+        self.records += 1
+
+    def record_poll(
+        self,
+        mode: str,
+        raw: dict[str, Any] | None,
+        latency: float | None = None,
+        source: str | None = None,
+    ) -> None:
+        record: dict[str, Any] = {"k": KIND_POLL, "m": mode, "raw": raw}
+        if latency is not None:
+            record["ms"] = round(latency * 1000, 1)
+        if source is not None:
+            record["src"] = source
+        self._append(record)
+
+    def record_error(self, mode: str, error: Exception) -> None:
+        self._append({"k": KIND_ERROR, "m": mode, "err": str(error)})
+
+    def record_command(self, param: str, value: Any, error: Exception | None) -> None:
+        record: dict[str, Any] = {"k": KIND_COMMAND, "p": param, "v": value, "ok": error is None}
+        if error is not None:
+            record["err"] = str(error)
+        self._append(record)
+
+    def drain(self) -> list[str]:
+        """Take the buffered lines, to be passed to ``write``."""
+        lines, self._buffer = self._buffer, []
+        return lines
+
+    def flush(self) -> None:
+        """Write the buffered records (blocking)."""
+        self.write(self.drain())
+
+    def write(self, lines: list[str]) -> None:
+        """Append ``lines`` to the file, rotating it when full (blocking)."""
+        if not lines:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.write("\n".join(lines) + "\n")
+            size = fh.tell()
+        if size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        for index in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{index}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+def recording_files(path: str) -> list[str]:
+    """The files of a recording, oldest first (rotated backups included)."""
+    backups = []
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        backups.append(f"{path}.{index}")
+        index += 1
+    files = list(reversed(backups))
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def read_recording(path: str) -> Iterator[dict[str, Any]]:
+    """Yield the records of a recording in order; damaged lines are skipped."""
+    for name in recording_files(path):
+        with open(name, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict):
+                    yield record
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+if TYPE_CHECKING:
+    from .budget import WriteBudget
+
+_LOGGER = logging.getLogger(__name__)
+
+# parametri scrivibili (stessi nomi dei campi normalizzati)
+PARAM_STATUS = "status"
+PARAM_POWER = "power"
+PARAM_SET_AIR = "setAir"
+PARAM_SET_WATER = "setWater"
+
+
+class CommandSuperseded(Exception):
+    """A write dropped by a later on/off command before it was sent."""
+
+
+CommandListener = Callable[[str, Any, "Exception | None"], None]
+
+
+@dataclass
+class _PendingCommand:
+    value: Any
+    enqueued_at: float
+    ready_at: float
+    waiters: list[asyncio.Future] = field(default_factory=list)
+    deferred: bool = False
+
+
+class WiNetCommandQueue:
+    """Per-stove write pipeline.
+
+    Writes are sent one at a time, the first ready first, at least
+    ``min_gap`` seconds apart. Setpoint writes wait ``debounce`` seconds and
+    a newer value for the same parameter replaces the pending one; an on/off
+    command drops every pending setpoint write. With a ``budget``, setpoint
+    writes also wait for the parameter's write budget (on/off commands are
+    only counted).
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str, Any], Awaitable[None]],
+        min_gap: float,
+        debounce: float,
+        budget: WriteBudget | None = None,
+    ) -> None:
+        self._send = send
+        self.min_gap = min_gap
+        self.debounce = debounce
+        self.budget = budget
+
+        self._pending: dict[str, _PendingCommand] = {}
+        self._listeners: list[CommandListener] = []
+        self._wakeup = asyncio.Event()
+        self._worker: asyncio.Task | None = None
+        self._last_sent = 0.0
+
+        self.sent = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.superseded = 0
+        self.deferred = 0
+        self.last_latency: float | None = None
+        self._latency_total = 0.0
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def is_pending(self, param: str) -> bool:
+        return param in self._pending
+
+    def add_listener(self, listener: CommandListener) -> Callable[[], None]:
+        """Call ``listener(param, value, error)`` after every executed write.
+
+        Writes dropped by an on/off command are reported with a
+        ``CommandSuperseded`` error.
+        """
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def submit(
+        self,
+        param: str,
+        value: Any,
+        wait: bool = False,
+        immediate: bool = False,
+    ) -> asyncio.Future | None:
+        """Queue a write; with ``wait`` return a future resolved once it is sent.
+
+        The future fails with ``CommandSuperseded`` if an on/off command
+        drops the write first. ``immediate`` skips the debounce (the caller already settled the value).
+        """
+        now = monotonic()
+
+        if param == PARAM_STATUS:
+            # accensione/spegnimento: i setpoint in attesa non hanno più senso
+            for other in [p for p in self._pending if p != PARAM_STATUS]:
+                dropped = self._pending.pop(other)
+                self.superseded += 1
+                # il valore non è mai arrivato alla stufa: chi attende deve saperlo
+                error = CommandSuperseded(other)
+                self._resolve(dropped, error)
+                self._notify(other, dropped.value, error)
+
+        ready_at = now if param == PARAM_STATUS or immediate else now + self.debounce
+        item = self._pending.get(param)
+        if item is None:
+            item = _PendingCommand(value=value, enqueued_at=now, ready_at=ready_at)
+            self._pending[param] = item
+        else:
+            self.coalesced += 1
+            item.value = value
+            item.ready_at = ready_at
+
+        waiter = None
+        if wait:
+            waiter = asyncio.get_running_loop().create_future()
+            item.waiters.append(waiter)
+
+        self._wakeup.set()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        return waiter
+
+    def submit_batch(self, values: dict[str, Any], wait: bool = False) -> asyncio.Future | None:
+        """Queue several writes to go out together, in a single pass.
+
+        The on/off command goes first, so it does not drop the setpoints of
+        the same batch; the others follow without debounce.
+        """
+        ordered = sorted(values.items(), key=lambda item: item[0] != PARAM_STATUS)
+        waiters = [
+            self.submit(param, value, wait=wait, immediate=True) for param, value in ordered
+        ]
+        return asyncio.gather(*waiters) if wait else None
+
+    async def async_write(self, param: str, value: Any) -> None:
+        """Queue a write and wait until the stove has received it.
+
+        Raises ``CommandSuperseded`` if an on/off command dropped it.
+        """
+        await self.submit(param, value, wait=True)
+
+    async def async_close(self) -> None:
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+        self._worker = None
+        for item in self._pending.values():
+            for waiter in item.waiters:
+                if not waiter.done():
+                    waiter.cancel()
+        self._pending.clear()
+
+    def stats(self) -> dict[str, Any]:
+        sent = self.sent + self.failed
+        return {
+            "depth": self.depth,
+            "sent": self.sent,
+            "failed": self.failed,
+            "coalesced": self.coalesced,
+            "superseded": self.superseded,
+            "deferred": self.deferred,
+            "last_latency": self.last_latency,
+            "avg_latency": self._latency_total / sent if sent else None,
+        }
+
+    async def _run(self) -> None:
+        while self._pending:
+            param, item, ready_at = min(
+                ((p, it, self._ready_at(p, it)) for p, it in self._pending.items()),
+                key=lambda entry: entry[2],
+            )
+            delay = ready_at - monotonic()
+            if delay > 0:
+                # la coda può cambiare durante l'attesa: si ricontrolla la testa
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            del self._pending[param]
+            error: Exception | None = None
+            try:
+                await self._send(param, item.value)
+            except asyncio.CancelledError:
+                # chiusura durante l'invio: il comando è già fuori coda, chi attende va sbloccato
+                for waiter in item.waiters:
+                    if not waiter.done():
+                        waiter.cancel()
+                raise
+            except Exception as err:  # noqa: BLE001 - il worker non deve morire
+                error = err
+                _LOGGER.warning("WiNet: comando %s=%s fallito: %s", param, item.value, err)
+
+            self._last_sent = monotonic()
+            latency = self._last_sent - item.enqueued_at
+            self.last_latency = latency
+            self._latency_total += latency
+            if error is None:
+                self.sent += 1
+                if self.budget is not None:
+                    self.budget.record(param)
+            else:
+                self.failed += 1
+
+            self._resolve(item, error)
+            self._notify(param, item.value, error)
+
+    def _ready_at(self, param: str, item: _PendingCommand) -> float:
+        ready_at = max(item.ready_at, self._last_sent + self.min_gap)
+        if self.budget is None or param == PARAM_STATUS:
+            # accensione/spegnimento non si rimandano mai
+            return ready_at
+        budget_delay = self.budget.delay(param)
+        if budget_delay > 0 and not item.deferred:
+            item.deferred = True
+            self.deferred += 1
+            _LOGGER.debug("WiNet: budget di scrittura di %s quasi esaurito, attesa %.0fs", param, budget_delay)
+        return max(ready_at, monotonic() + budget_delay)
+
+    def _notify(self, param: str, value: Any, error: Exception | None) -> None:
+        for listener in list(self._listeners):
+            listener(param, value, error)
+
+    @staticmethod
+    def _resolve(item: _PendingCommand, error: Exception | None) -> None:
+        for waiter in item.waiters:
+            if waiter.done():
+                continue
+            if error is None:
+                waiter.set_result(None)
+            else:
+                waiter.set_exception(error)
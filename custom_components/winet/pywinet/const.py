@@ -0,0 +1,47 @@
+MODE_LOCAL = "local"
+MODE_CLOUD = "cloud"
+# locale con failover automatico sul cloud
+MODE_HYBRID = "hybrid"
+
+# coda comandi: distanza minima tra due scritture e debounce dei setpoint (secondi)
+DEFAULT_COMMAND_GAP = 1.0
+DEFAULT_COMMAND_DEBOUNCE = 2.0
+# timeout di una richiesta HTTP (secondi)
+DEFAULT_REQUEST_TIMEOUT = 8
+
+# termostato interno: solo on/off con isteresi, oppure anche modulazione PI della potenza
+LOOP_HYSTERESIS = "hysteresis"
+LOOP_PI = "pi"
+
+# banda morta per campo: sotto questa variazione le entità non riscrivono lo stato
+FIELD_DEADBANDS = {
+    "gasflue": 0.5,
+    "rpmExtractor": 50,
+}
+
+# codici stato mostrati subito (in modo ottimistico) dopo accensione/spegnimento
+STATUS_CODE_OFF = 0
+STATUS_CODE_ON = {MODE_LOCAL: 1, MODE_CLOUD: 3}
+# codici per cui la stufa è considerata accesa
+STATUS_ON_CODES = {MODE_LOCAL: (1,), MODE_CLOUD: (3, 4)}
+
+STATUS_MAP_LOCAL = {
+    0: "SPENTO",
+    1: "ACCESO",
+    2: "PULIZIA FINALE",
+    3: "ALARM",
+    4: "UNMANAGED",
+}
+
+STATUS_MAP_CLOUD = {
+    0: "SPENTO",
+    1: "ATTESA FIAMMA",
+    2: "ATTESA FIAMMA",
+    3: "ACCESO",
+    4: "ACCESO",
+    5: "STAND-BY",
+    6: "PULIZIA FINALE",
+    7: "PULIZIA BRACIERE",
+    8: "ALARM",
+    9: "ALARM",
+}
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Sequence
+
+from .snapshot import WiNetSnapshot
+
+# intervalli più lunghi (poll falliti, riavvii) non vengono integrati per intero
+MAX_INTEGRATION_GAP = 600
+
+
+class ConsumptionMeter:
+    """Integrate pellet use and heat output over time spent at each power.
+
+    ``pellet_rates`` (kg/h) and ``heat_rates`` (kW) are indexed by power
+    level - 1. Each ``update`` adds the time elapsed since the previous
+    sample, charged at the previous sample's power if the stove was
+    burning then; gaps longer than ``max_gap`` only count up to that limit.
+    Totals only ever grow.
+    """
+
+    def __init__(
+        self,
+        pellet_rates: Sequence[float],
+        heat_rates: Sequence[float],
+        max_gap: float = MAX_INTEGRATION_GAP,
+    ) -> None:
+        self.pellet_rates = tuple(pellet_rates)
+        self.heat_rates = tuple(heat_rates)
+        self.max_gap = max_gap
+        self.pellet_kg = 0.0
+        self.heat_kwh = 0.0
+        self.burn_seconds: dict[int, float] = {}
+        self._last_ts: float | None = None
+        self._last_power: int | None = None
+
+    def _rate(self, rates: tuple[float, ...], power: int) -> float:
+        return rates[min(max(power, 1), len(rates)) - 1] if rates else 0.0
+
+    def update(self, snapshot: WiNetSnapshot, ts: float | None = None) -> bool:
+        """Account the interval ending at ``ts``; True if the totals changed."""
+        ts = time.time() if ts is None else ts
+        changed = False
+        if self._last_ts is not None and self._last_power is not None and ts > self._last_ts:
+            seconds = min(ts - self._last_ts, self.max_gap)
+            hours = seconds / 3600
+            power = self._last_power
+            self.pellet_kg += self._rate(self.pellet_rates, power) * hours
+            self.heat_kwh += self._rate(self.heat_rates, power) * hours
+            self.burn_seconds[power] = self.burn_seconds.get(power, 0.0) + seconds
+            changed = True
+
+        self._last_ts = ts
+        self._last_power = snapshot.power if snapshot.is_on and snapshot.power else None
+        return changed
+
+    @property
+    def heat_kw(self) -> float | None:
+        """Estimated heat output right now (0 when not burning)."""
+        if self._last_ts is None:
+            return None
+        return self._rate(self.heat_rates, self._last_power) if self._last_power else 0.0
+
+    def to_storage(self) -> dict[str, Any]:
+        return {
+            "pellet_kg": self.pellet_kg,
+            "heat_kwh": self.heat_kwh,
+            "burn_seconds": {str(power): s for power, s in self.burn_seconds.items()},
+        }
+
+    def load(self, data: dict[str, Any]) -> None:
+        self.pellet_kg = float(data.get("pellet_kg", 0.0))
+        self.heat_kwh = float(data.get("heat_kwh", 0.0))
+        self.burn_seconds = {
+            int(power): float(s) for power, s in data.get("burn_seconds", {}).items()
+        }
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import math
+from typing import Any
+
+from .commands import PARAM_STATUS, PARAM_POWER
+from .const import LOOP_PI
+
+# banda (°C) attorno al target: accende sotto target - banda, spegne sopra target + banda
+HYSTERESIS = 0.5
+# cicli lunghi: accensione e spegnimento di una stufa a pellet durano minuti
+MIN_ON_TIME = 1200
+MIN_OFF_TIME = 600
+# si accende solo da ferma: mai durante accensione, pulizia o allarme
+IGNITABLE_STATES = ("SPENTO", "STAND-BY")
+# al più un gradino di potenza ogni tanto, e solo per scostamenti netti
+POWER_STEP_INTERVAL = 600
+POWER_DEADBAND = 0.75
+POWER_MIN = 1
+POWER_MAX = 5
+# guadagni PI: livelli di potenza per °C e per °C·s
+PI_KP = 1.5
+PI_KI = 1.5 / 1800
+# un intervallo più lungo (poll persi) non conta per intero nell'integrale
+MAX_INTEGRATION_STEP = 300
+
+
+class HeatingController:
+    """Thermostat loop on the air reading, designed to write rarely.
+
+    The stove is ignited below ``target - HYSTERESIS``, only from one of
+    ``IGNITABLE_STATES``, and shut down above ``target + HYSTERESIS``,
+    respecting minimum on and off times (counted from the last on/off
+    change, observed or requested here). With ``LOOP_PI`` the
+    power follows a PI controller, one level at a time and at most every
+    ``POWER_STEP_INTERVAL``; with ``LOOP_HYSTERESIS`` it is left alone.
+    ``decide`` returns only the parameters to change.
+    """
+
+    def __init__(self, loop: str = LOOP_PI) -> None:
+        self.loop = loop
+        self.integral: float | None = None
+        self._last_ts: float | None = None
+        self._last_on: bool | None = None
+        self._switched_at = -math.inf
+        self._stepped_at = -math.inf
+
+    def reset(self) -> None:
+        self.integral = None
+        self._last_ts = None
+
+    def decide(
+        self,
+        now: float,
+        air: float | None,
+        target: float | None,
+        state: str | None,
+        is_on: bool,
+        power: int | None,
+    ) -> dict[str, Any]:
+        if is_on != self._last_on:
+            if self._last_on is not None:
+                self._switched_at = now
+            self._last_on = is_on
+            self.reset()
+        if air is None or target is None:
+            return {}
+
+        error = target - air
+        if not is_on:
+            if (
+                state in IGNITABLE_STATES
+                and error >= HYSTERESIS
+                and now - self._switched_at >= MIN_OFF_TIME
+            ):
+                self._switched_at = now
+                return {PARAM_STATUS: True}
+            return {}
+
+        if error <= -HYSTERESIS and now - self._switched_at >= MIN_ON_TIME:
+            self._switched_at = now
+            return {PARAM_STATUS: False}
+        if self.loop != LOOP_PI or power is None:
+            return {}
+        return self._modulate(now, error, power)
+
+    def _modulate(self, now: float, error: float, power: int) -> dict[str, Any]:
+        if self.integral is None:
+            # avvio senza scatti: l'integrale riproduce la potenza attuale
+            self.integral = (power - PI_KP * error) / PI_KI
+        elif self._last_ts is not None:
+            self.integral += error * min(now - self._last_ts, MAX_INTEGRATION_STEP)
+        # anti-windup: il termine integrale resta nel campo di potenza
+        self.integral = min(max(self.integral, 0.0), POWER_MAX / PI_KI)
+        self._last_ts = now
+
+        output = PI_KP * error + PI_KI * self.integral
+        if abs(output - power) < POWER_DEADBAND or now - self._stepped_at < POWER_STEP_INTERVAL:
+            return {}
+        level = power + (1 if output > power else -1)
+        level = min(max(level, POWER_MIN), POWER_MAX)
+        if level == power:
+            return {}
+        self._stepped_at = now
+        return {PARAM_POWER: level}
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import math
+import time
+from array import array
+from typing import Callable, Iterator
+
+from .snapshot import WiNetSnapshot
+
+# colonne registrate per ogni campione (oltre al timestamp); "on" vale 1/0
+HISTORY_FIELDS = ("status", "air", "setAir", "power", "gasflue", "rpmExtractor", "water")
+HISTORY_ON = "on"
+
+_NAN = float("nan")
+
+
+class SampleHistory:
+    """Fixed-size ring buffer of decoded samples, one ``array`` per column.
+
+    ``append`` is O(1) and memory is allocated once. Queries look back
+    ``seconds`` from the newest sample and skip missing values.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._ts = array("d", bytes(8 * capacity))
+        self._columns = {
+            name: array("d", bytes(8 * capacity)) for name in (*HISTORY_FIELDS, HISTORY_ON)
+        }
+        self._head = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, snapshot: WiNetSnapshot, ts: float | None = None) -> None:
+        index = self._head
+        self._ts[index] = time.time() if ts is None else ts
+        for name in HISTORY_FIELDS:
+            value = getattr(snapshot, name)
+            self._columns[name][index] = _NAN if value is None else float(value)
+        self._columns[HISTORY_ON][index] = 1.0 if snapshot.is_on else 0.0
+        self._head = (index + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    @property
+    def last_ts(self) -> float | None:
+        return self._ts[self._head - 1] if self.size else None
+
+    def _indexes(self, seconds: float | None) -> Iterator[int]:
+        """Indexes newest first, within ``seconds`` of the newest sample."""
+        if not self.size:
+            return
+        newest = self._head - 1
+        horizon = None if seconds is None else self._ts[newest] - seconds
+        for offset in range(self.size):
+            index = (newest - offset) % self.capacity
+            if horizon is not None and self._ts[index] < horizon:
+                return
+            yield index
+
+    def values(self, name: str, seconds: float | None = None) -> Iterator[tuple[float, float]]:
+        """``(timestamp, value)`` pairs, newest first, without missing values."""
+        column = self._columns[name]
+        for index in self._indexes(seconds):
+            value = column[index]
+            if not math.isnan(value):
+                yield self._ts[index], value
+
+    def min(self, name: str, seconds: float | None = None) -> float | None:
+        return min((v for _ts, v in self.values(name, seconds)), default=None)
+
+    def max(self, name: str, seconds: float | None = None) -> float | None:
+        return max((v for _ts, v in self.values(name, seconds)), default=None)
+
+    def mean(self, name: str, seconds: float | None = None) -> float | None:
+        total = 0.0
+        count = 0
+        for _ts, value in self.values(name, seconds):
+            total += value
+            count += 1
+        return total / count if count else None
+
+    def slope(self, name: str, seconds: float | None = None) -> float | None:
+        """Least-squares slope in units per second (None with < 2 samples)."""
+        n = 0
+        sum_t = sum_v = sum_tt = sum_tv = 0.0
+        origin: float | None = None
+        for ts, value in self.values(name, seconds):
+            if origin is None:
+                origin = ts
+            t = ts - origin
+            n += 1
+            sum_t += t
+            sum_v += value
+            sum_tt += t * t
+            sum_tv += t * value
+        if n < 2:
+            return None
+        denominator = n * sum_tt - sum_t * sum_t
+        if denominator == 0:
+            return None
+        return (n * sum_tv - sum_t * sum_v) / denominator
+
+    def time_in_state(
+        self,
+        predicate: Callable[[float], bool],
+        seconds: float | None = None,
+        name: str = HISTORY_ON,
+    ) -> float:
+        """Seconds within the window during which ``predicate(value)`` held.
+
+        Each sample's value is held until the next sample. By default the
+        ``on`` column is used (``predicate=bool`` gives the time on).
+        """
+        column = self._columns[name]
+        total = 0.0
+        later: float | None = None
+        for index in self._indexes(seconds):
+            ts = self._ts[index]
+            value = column[index]
+            if later is not None and not math.isnan(value) and predicate(value):
+                total += later - ts
+            later = ts
+        return total
+
+    def on_since(self) -> float | None:
+        """Timestamp of the first sample of the current on period."""
+        column = self._columns[HISTORY_ON]
+        since = None
+        for index in self._indexes(None):
+            if not column[index]:
+                break
+            since = self._ts[index]
+        return since
+
+
+class OnTimeWindow:
+    """Seconds spent on over a rolling window, with constant memory.
+
+    Independent of the sample rate: the time is summed in ``bucket``-second
+    totals (one slot per bucket of the window), so the window is exact to
+    within one bucket however many polls it spans. As in ``time_in_state``
+    each sample's on/off value is held until the next sample.
+    """
+
+    def __init__(self, window: int, bucket: int = 60) -> None:
+        self.bucket = bucket
+        self.slots = max(1, window // bucket)
+        self._seconds = array("d", bytes(8 * self.slots))
+        # numero del bucket contenuto in ogni slot (-1 = vuoto)
+        self._numbers = array("q", [-1] * self.slots)
+        self._last_ts: float | None = None
+        self._last_on = False
+
+    def append(self, on: bool, ts: float | None = None) -> None:
+        ts = time.time() if ts is None else ts
+        if self._last_ts is not None and self._last_on and ts > self._last_ts:
+            self._add(self._last_ts, ts)
+        self._last_ts = ts
+        self._last_on = on
+
+    def _add(self, start: float, end: float) -> None:
+        # oltre la finestra non serve distribuire
+        start = max(start, end - self.slots * self.bucket)
+        while start < end:
+            number = int(start // self.bucket)
+            stop = min(end, (number + 1) * self.bucket)
+            slot = number % self.slots
+            if self._numbers[slot] != number:
+                self._numbers[slot] = number
+                self._seconds[slot] = 0.0
+            self._seconds[slot] += stop - start
+            start = stop
+
+    def total(self, now: float | None = None) -> float | None:
+        """Seconds on within the window ending at ``now`` (default: last sample)."""
+        now = self._last_ts if now is None else now
+        if now is None:
+            return None
+        newest = int(now // self.bucket)
+        oldest = newest - self.slots + 1
+        return sum(
+            seconds
+            for number, seconds in zip(self._numbers, self._seconds)
+            if oldest <= number <= newest
+        )
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Any
+
+# campioni tenuti per endpoint (finestra mobile)
+METRICS_WINDOW = 256
+
+
+def percentile(samples: list[float], pct: float) -> float | None:
+    """Nearest-rank percentile of ``samples`` (unsorted)."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class EndpointStats:
+    """Rolling latency window and error counters for one endpoint."""
+
+    __slots__ = (
+        "latencies",
+        "outcomes",
+        "requests",
+        "timeouts",
+        "http_errors",
+        "network_errors",
+        "invalid",
+        "bytes",
+    )
+
+    def __init__(self, window: int = METRICS_WINDOW) -> None:
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.requests = 0
+        self.timeouts = 0
+        self.http_errors = 0
+        self.network_errors = 0
+        self.invalid = 0
+        self.bytes = 0
+
+    def record(self, latency: float, ok: bool, size: int = 0) -> None:
+        self.requests += 1
+        self.latencies.append(latency)
+        self.outcomes.append(ok)
+        self.bytes += size
+
+    @property
+    def error_rate(self) -> float | None:
+        if not self.outcomes:
+            return None
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def as_dict(self) -> dict[str, Any]:
+        samples = list(self.latencies)
+
+        def ms(value: float | None) -> float | None:
+            return None if value is None else round(value * 1000, 1)
+
+        return {
+            "requests": self.requests,
+            "p50_ms": ms(percentile(samples, 50)),
+            "p95_ms": ms(percentile(samples, 95)),
+            "p99_ms": ms(percentile(samples, 99)),
+            "timeouts": self.timeouts,
+            "http_errors": self.http_errors,
+            "network_errors": self.network_errors,
+            "invalid": self.invalid,
+            "bytes": self.bytes,
+            "error_rate": self.error_rate,
+        }
+
+
+class ApiMetrics:
+    """Per-endpoint statistics collected by ``WiNetApi``.
+
+    Besides the HTTP endpoints, ``poll`` tracks whole ``get_all`` calls and
+    ``schedule_lag`` how late the hub started each poll, which points at a
+    busy event loop rather than the network.
+    """
+
+    def __init__(self, window: int = METRICS_WINDOW) -> None:
+        self._window = window
+        self.endpoints: dict[str, EndpointStats] = {}
+
+    def endpoint(self, name: str) -> EndpointStats:
+        stats = self.endpoints.get(name)
+        if stats is None:
+            stats = self.endpoints[name] = EndpointStats(self._window)
+        return stats
+
+    @property
+    def poll(self) -> EndpointStats:
+        return self.endpoint("poll")
+
+    def as_dict(self) -> dict[str, Any]:
+        return {name: stats.as_dict() for name, stats in sorted(self.endpoints.items())}
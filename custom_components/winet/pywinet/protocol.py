@@ -0,0 +1,581 @@
+"""WiNet protocol client, independent of Home Assistant.
+
+Only depends on aiohttp and on the HA-free helpers of this package
+(snapshot decoding, metrics, circuit breaker, command queue), so tools
+and other services can drive a stove directly. ``api.WiNetApi`` adapts
+it to Home Assistant.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Any, Awaitable, Callable, TypeVar
+
+import aiohttp
+
+from .breaker import CircuitBreaker
+from .budget import WriteBudget
+from .commands import (
+    WiNetCommandQueue,
+    PARAM_STATUS,
+    PARAM_POWER,
+    PARAM_SET_AIR,
+    PARAM_SET_WATER,
+)
+from .const import (
+    MODE_LOCAL,
+    MODE_CLOUD,
+    MODE_HYBRID,
+    DEFAULT_COMMAND_GAP,
+    DEFAULT_COMMAND_DEBOUNCE,
+    DEFAULT_REQUEST_TIMEOUT,
+)
+from .metrics import ApiMetrics
+from .singleflight import SingleFlight
+from .snapshot import (
+    WiNetSnapshot,
+    CLOUD_TABLE,
+    decode_local,
+    decode_cloud_field,
+    to_half_degrees,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+CLOUD_BASE = "https://ws.cloudwinet.it/WiNetStove.svc/json"
+
+# pausa tra un tentativo fallito e il successivo
+RETRY_DELAY = 1.0
+# campi cloud che cambiano solo con una scrittura o dal pannello: letti al più
+# ogni TTL secondi; le nostre scritture aggiornano subito la cache
+CLOUD_FIELD_TTL = {
+    "power": 300.0,
+    "setAir": 300.0,
+}
+
+# pool dedicato: il server HTTP del modulo locale serve una richiesta alla volta
+LOCAL_POOL_LIMIT = 1
+CLOUD_POOL_LIMIT = 4
+POOL_KEEPALIVE = 60
+DNS_CACHE_TTL = 300
+
+
+class WiNetApiError(Exception):
+    """Generic WiNet API error."""
+
+
+@dataclass
+class ConnectionStats:
+    """Counters collected on the dedicated connection pool."""
+
+    handshakes: int = 0
+    reused: int = 0
+    dns_cache_hits: int = 0
+    dns_cache_misses: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "handshakes": self.handshakes,
+            "reused": self.reused,
+            "dns_cache_hits": self.dns_cache_hits,
+            "dns_cache_misses": self.dns_cache_misses,
+        }
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def _on_create(session, ctx, params) -> None:
+            self.handshakes += 1
+
+        async def _on_reuse(session, ctx, params) -> None:
+            self.reused += 1
+
+        async def _on_dns_hit(session, ctx, params) -> None:
+            self.dns_cache_hits += 1
+
+        async def _on_dns_miss(session, ctx, params) -> None:
+            self.dns_cache_misses += 1
+
+        trace.on_connection_create_end.append(_on_create)
+        trace.on_connection_reuseconn.append(_on_reuse)
+        trace.on_dns_cache_hit.append(_on_dns_hit)
+        trace.on_dns_cache_miss.append(_on_dns_miss)
+        return trace
+
+
+@dataclass
+class WiNetClient:
+    """Local/cloud WiNet client.
+
+    Without an injected ``session`` the client opens (and closes in
+    ``async_close``) its own; it can also be used as an async context
+    manager.
+    """
+
+    mode: str
+    host: str | None = None
+    stove_id: str | None = None
+    dedicated_pool: bool = False
+    command_gap: float = DEFAULT_COMMAND_GAP
+    command_debounce: float = DEFAULT_COMMAND_DEBOUNCE
+    keep_raw: bool = False
+    request_timeout: float = DEFAULT_REQUEST_TIMEOUT
+    # tentativi extra dopo un timeout o un errore di rete, per letture e comandi
+    read_retries: int = 0
+    command_retries: int = 0
+    # sovrascrivibile per puntare a un emulatore
+    cloud_base: str = CLOUD_BASE
+    # iniettati dall'hub: sessione cloud condivisa e limite globale di richieste
+    session: aiohttp.ClientSession | None = None
+    cloud_session: aiohttp.ClientSession | None = None
+    limiter: asyncio.Semaphore | None = None
+
+    stats: ConnectionStats = field(default_factory=ConnectionStats)
+    metrics: ApiMetrics = field(default_factory=ApiMetrics, init=False)
+    # un circuit breaker per trasporto (in ibrido servono entrambi)
+    breakers: dict[str, CircuitBreaker] = field(
+        default_factory=lambda: {MODE_LOCAL: CircuitBreaker(), MODE_CLOUD: CircuitBreaker()},
+        init=False,
+    )
+    # letture condivise per trasporto: il modulo locale serve una richiesta alla volta
+    flights: dict[str, SingleFlight[WiNetSnapshot]] = field(default_factory=dict, init=False)
+    # campi richiesti dalle entità attive (None = tutti): il resto non si legge né si decodifica
+    wanted_fields: frozenset[str] | None = field(default=None, init=False)
+    # modalità ibrida: True quando si sta usando il cloud al posto della rete locale
+    failover: bool = field(default=False, init=False)
+    _own_session: aiohttp.ClientSession | None = field(default=None, init=False, repr=False)
+    # contatori di scrittura per parametro (protezione EEPROM); None = nessun limite,
+    # come per tools ed emulatori. L'integrazione ne passa uno persistente
+    budget: WriteBudget | None = None
+    _commands: WiNetCommandQueue | None = field(default=None, init=False, repr=False)
+
+    # ultimi valori cloud validi, usati per i campi "stale" di un poll parziale
+    # e, finché non scade il TTL, al posto di rileggere i campi lenti
+    _last_cloud: dict[str, Any] = field(default_factory=dict, init=False, repr=False)
+    _cloud_fresh_until: dict[str, float] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.flights = {
+            MODE_LOCAL: SingleFlight(self._fetch_local),
+            MODE_CLOUD: SingleFlight(self._fetch_cloud),
+        }
+
+    @property
+    def _timeout(self) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(total=self.request_timeout)
+
+    @property
+    def cloud_poll_deadline(self) -> float:
+        """Single deadline for a cloud poll, whose calls start together.
+
+        It leaves room for every attempt of one endpoint, so the timeout
+        and retry settings apply to cloud polls as well.
+        """
+        return self.request_timeout * (self.read_retries + 1) + RETRY_DELAY * self.read_retries
+
+    def set_command_timing(self, gap: float, debounce: float) -> None:
+        """Change the command spacing and debounce, also while running."""
+        self.command_gap = gap
+        self.command_debounce = debounce
+        if self._commands is not None:
+            self._commands.min_gap = gap
+            self._commands.debounce = debounce
+
+    @property
+    def transport(self) -> str:
+        """Transport in use right now (local or cloud)."""
+        if self.mode == MODE_HYBRID:
+            return MODE_CLOUD if self.failover else MODE_LOCAL
+        return self.mode
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return self.breakers[self.transport]
+
+    def _session(self, transport: str) -> aiohttp.ClientSession:
+        if transport == MODE_CLOUD and self.cloud_session is not None:
+            return self.cloud_session
+
+        if self.session is not None:
+            return self.session
+
+        if not self.dedicated_pool:
+            return self._shared_session()
+
+        if self._own_session is None or self._own_session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=CLOUD_POOL_LIMIT if self.mode == MODE_CLOUD else LOCAL_POOL_LIMIT,
+                keepalive_timeout=POOL_KEEPALIVE,
+                ttl_dns_cache=DNS_CACHE_TTL,
+            )
+            self._own_session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self._timeout,
+                trace_configs=[self.stats.trace_config()],
+            )
+        return self._own_session
+
+    def _shared_session(self) -> aiohttp.ClientSession:
+        """Session used when no pool is injected nor dedicated."""
+        if self._own_session is None or self._own_session.closed:
+            self._own_session = aiohttp.ClientSession(timeout=self._timeout)
+        return self._own_session
+
+    def _local_url(self, path: str) -> str:
+        return f"http://{self.host}/api/{path}"
+
+    def _cloud_url(self, endpoint: str, *args: Any) -> str:
+        # i parametri cloud seguono lo stove_id separati da ';'
+        return f"{self.cloud_base}/{endpoint}/" + ";".join([str(self.stove_id), *map(str, args)])
+
+    @property
+    def commands(self) -> WiNetCommandQueue:
+        """Command queue shared by every entity writing to this stove."""
+        if self._commands is None:
+            self._commands = WiNetCommandQueue(
+                self._send_command,
+                min_gap=self.command_gap,
+                debounce=self.command_debounce,
+                budget=self.budget,
+            )
+        return self._commands
+
+    async def _send_command(self, param: str, value: Any) -> None:
+        if param == PARAM_STATUS:
+            await (self.ignite() if value else self.shutdown())
+        elif param == PARAM_POWER:
+            await self.set_power(int(value))
+        elif param == PARAM_SET_AIR:
+            await self.set_air_temperature(value)
+        elif param == PARAM_SET_WATER:
+            await self.set_water_temperature(value)
+        else:
+            raise WiNetApiError(f"Parametro sconosciuto: {param}")
+
+    async def async_close(self) -> None:
+        """Stop the command queue and close the dedicated connection pool."""
+        if self._commands is not None:
+            await self._commands.async_close()
+        if self._own_session is not None and not self._own_session.closed:
+            await self._own_session.close()
+        self._own_session = None
+
+    async def __aenter__(self) -> WiNetClient:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.async_close()
+
+    def _limit(self):
+        return self.limiter if self.limiter is not None else contextlib.nullcontext()
+
+    async def _request(
+        self, url: str, endpoint: str, timeout_msg: str, retries: int = 0
+    ) -> bytes:
+        """GET ``url``, trying again up to ``retries`` times on timeouts and
+        network errors (not on HTTP errors or with the circuit open)."""
+        attempt = 0
+        while True:
+            try:
+                return await self._request_once(url, endpoint, timeout_msg)
+            except WiNetApiError as err:
+                transient = isinstance(err.__cause__, (asyncio.TimeoutError, aiohttp.ClientError))
+                if not transient or attempt >= retries:
+                    raise
+                _LOGGER.debug("WiNet: nuovo tentativo su %s dopo: %s", endpoint, err)
+            attempt += 1
+            await asyncio.sleep(RETRY_DELAY)
+
+    async def _request_once(self, url: str, endpoint: str, timeout_msg: str) -> bytes:
+        stats = self.metrics.endpoint(endpoint)
+        transport = MODE_CLOUD if url.startswith(self.cloud_base) else MODE_LOCAL
+        breaker = self.breakers[transport]
+        if not breaker.allow():
+            raise WiNetApiError("Stufa non raggiungibile (circuito aperto)")
+
+        ok = False
+        size = 0
+        # None = richiesta interrotta (es. cancellata), non giudica la raggiungibilità
+        reachable: bool | None = None
+        started = False
+        try:
+            async with self._limit():
+                started = True
+                start = monotonic()
+                try:
+                    async with self._session(transport).get(
+                        url,
+                        timeout=self._timeout,
+                    ) as resp:
+                        reachable = True
+                        if resp.status != 200:
+                            stats.http_errors += 1
+                            raise WiNetApiError(f"HTTP {resp.status} su {url}")
+                        body = await resp.read()
+                    ok = True
+                    size = len(body)
+                    return body
+
+                except asyncio.TimeoutError as e:
+                    reachable = False
+                    stats.timeouts += 1
+                    raise WiNetApiError(timeout_msg) from e
+                except aiohttp.ClientError as e:
+                    reachable = False
+                    stats.network_errors += 1
+                    raise WiNetApiError(f"Errore rete: {e}") from e
+                finally:
+                    stats.record(monotonic() - start, ok, size)
+                    if reachable is None:
+                        breaker.release()
+                    elif reachable:
+                        breaker.record_success()
+                    else:
+                        breaker.record_failure()
+        finally:
+            if not started:
+                # cancellata in attesa del limite: la sonda half-open non deve restare occupata
+                breaker.release()
+
+    async def _get_json(self, url: str, endpoint: str) -> dict[str, Any]:
+        body = await self._request(url, endpoint, "Timeout chiamando WiNet", self.read_retries)
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            self.metrics.endpoint(endpoint).invalid += 1
+            raise WiNetApiError(f"Risposta non valida da {endpoint}")
+        return data
+
+    async def _call(self, url: str, endpoint: str) -> None:
+        # Nel YAML i comandi sono URL GET anche quando 'sembrano' comandi.
+        await self._request(url, endpoint, "Timeout inviando comando WiNet", self.command_retries)
+
+    def _require(self) -> None:
+        if self.mode in (MODE_LOCAL, MODE_HYBRID) and not self.host:
+            raise WiNetApiError("Host/IP mancante per modalità Locale")
+        if self.mode in (MODE_CLOUD, MODE_HYBRID) and not self.stove_id:
+            raise WiNetApiError("Stove ID mancante per modalità Cloud")
+
+    async def _dispatch(
+        self,
+        local: Callable[[], Awaitable[_T]],
+        cloud: Callable[[], Awaitable[_T]],
+    ) -> _T:
+        """Run an operation on the configured transport.
+
+        In hybrid mode the local API is always tried first and the cloud is
+        used when it fails. While the stove is offline locally the local
+        circuit breaker rejects at once, and its half-open probes act as
+        health checks: the first local success ends the failover.
+        """
+        if self.mode == MODE_LOCAL:
+            return await local()
+        if self.mode == MODE_CLOUD:
+            return await cloud()
+
+        try:
+            result = await local()
+        except WiNetApiError as err:
+            if not self.failover:
+                _LOGGER.warning("WiNet: API locale non disponibile (%s), passo al cloud", err)
+                self.failover = True
+            return await cloud()
+
+        if self.failover:
+            _LOGGER.info("WiNet: API locale di nuovo disponibile")
+            self.failover = False
+        return result
+
+    async def get_all(self, fresh: bool = False, shared: bool = True) -> WiNetSnapshot:
+        """Fetch and decode the current stove state.
+
+        Concurrent calls share a single fetch per transport. With ``fresh``
+        the caller gets a fetch started after its call (e.g. to see the
+        effect of a command) instead of joining one already in flight.
+        ``shared=False`` bypasses the sharing: every call is a request of
+        its own (load tests count requests, not callers).
+        """
+        self._require()
+
+        start = monotonic()
+        ok = False
+        try:
+            if shared:
+                snapshot = await self._dispatch(
+                    lambda: self.flights[MODE_LOCAL].run(fresh),
+                    lambda: self.flights[MODE_CLOUD].run(fresh),
+                )
+            else:
+                snapshot = await self._dispatch(self._fetch_local, self._fetch_cloud)
+            ok = True
+            return snapshot
+        finally:
+            self.metrics.poll.record(monotonic() - start, ok)
+
+    async def read_field(self, name: str) -> tuple[str, Any]:
+        """Read back a single decoded field with the cheapest request.
+
+        Returns ``(transport, value)``: in hybrid mode the value may come
+        from either API, and status codes differ between the two.
+        Cloud mode has one endpoint per field; local mode only exposes
+        ``/api/global``, so the read joins the next shared global fetch.
+        """
+        self._require()
+        return await self._dispatch(
+            lambda: self._read_field_local(name),
+            lambda: self._read_field_cloud(name),
+        )
+
+    async def _fetch_local(self) -> WiNetSnapshot:
+        data = await self._get_json(self._local_url("global"), "global")
+        return decode_local(data, self.keep_raw, self.wanted_fields)
+
+    async def _read_field_local(self, name: str) -> tuple[str, Any]:
+        snapshot = await self.flights[MODE_LOCAL].run(fresh=True)
+        return MODE_LOCAL, getattr(snapshot, name)
+
+    async def _read_field_cloud(self, name: str) -> tuple[str, Any]:
+        if name not in CLOUD_TABLE:
+            raise WiNetApiError(f"Campo {name} non disponibile in Cloud")
+        endpoint = CLOUD_TABLE[name][0]
+        payload = await self._get_json(self._cloud_url(endpoint), endpoint)
+        return MODE_CLOUD, self._cache_cloud(name, decode_cloud_field(name, payload))
+
+    def _cache_cloud(self, name: str, value: Any) -> Any:
+        self._last_cloud[name] = value
+        ttl = CLOUD_FIELD_TTL.get(name)
+        if ttl is not None:
+            self._cloud_fresh_until[name] = monotonic() + ttl
+        return value
+
+    def _invalidate_cloud(self, name: str) -> None:
+        self._cloud_fresh_until.pop(name, None)
+
+    async def _fetch_cloud(self) -> WiNetSnapshot:
+        """Fetch the cloud endpoints concurrently under a single deadline.
+
+        Only the endpoints of ``wanted_fields`` are called, and slow fields
+        still within their TTL are served from the cache. A
+        failing endpoint does not fail the poll: its field keeps the last
+        known value and is listed in ``stale``. Only if every fetched
+        endpoint fails the error is raised.
+        """
+        now = monotonic()
+        wanted = self.wanted_fields
+        values: dict[str, Any] = {
+            name: self._last_cloud[name]
+            for name, until in self._cloud_fresh_until.items()
+            if until > now and name in self._last_cloud and (wanted is None or name in wanted)
+        }
+        tasks = {
+            name: asyncio.create_task(
+                self._get_json(self._cloud_url(endpoint), endpoint)
+            )
+            for name, (endpoint, _key, _conv) in CLOUD_TABLE.items()
+            if name not in values and (wanted is None or name in wanted)
+        }
+
+        done: set[asyncio.Task] = set()
+        pending: set[asyncio.Task] = set()
+        # tutti i campi richiesti ancora nel TTL: niente da chiamare (wait rifiuta un insieme vuoto)
+        if tasks:
+            done, pending = await asyncio.wait(tasks.values(), timeout=self.cloud_poll_deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        raw: dict[str, Any] = {}
+        stale: set[str] = set()
+        first_error: BaseException | None = None
+
+        for name, task in tasks.items():
+            err = task.exception() if task in done else None
+            if task in done and err is None:
+                raw[name] = task.result()
+                values[name] = self._cache_cloud(name, decode_cloud_field(name, raw[name]))
+                continue
+
+            if task not in done:
+                err = WiNetApiError(f"Timeout globale del poll su {name}")
+            first_error = first_error or err
+            _LOGGER.debug("WiNet cloud: campo %s non aggiornato: %s", name, err)
+            stale.add(name)
+            values[name] = self._last_cloud.get(name)
+
+        if tasks and len(stale) == len(tasks):
+            if isinstance(first_error, WiNetApiError):
+                raise first_error
+            raise WiNetApiError(f"Poll cloud fallito: {first_error}") from first_error
+
+        return WiNetSnapshot(
+            MODE_CLOUD,
+            values,
+            stale=frozenset(stale),
+            raw=raw if self.keep_raw else None,
+        )
+
+    async def ignite(self) -> None:
+        self._require()
+        await self._dispatch(
+            lambda: self._call(self._local_url("status/1"), "status"),
+            lambda: self._call(self._cloud_url("Ignit"), "Ignit"),
+        )
+
+    async def shutdown(self) -> None:
+        self._require()
+        await self._dispatch(
+            lambda: self._call(self._local_url("status/0"), "status"),
+            lambda: self._call(self._cloud_url("Shutdown"), "Shutdown"),
+        )
+
+    async def set_power(self, level: int) -> None:
+        # range deciso: 1..5
+        if level < 1 or level > 5:
+            raise WiNetApiError("Power fuori range (1–5)")
+
+        self._require()
+        try:
+            await self._dispatch(
+                lambda: self._call(self._local_url(f"power/{level}"), "power"),
+                lambda: self._call(self._cloud_url("SetPower", level), "SetPower"),
+            )
+        except WiNetApiError:
+            self._invalidate_cloud("power")
+            raise
+        self._cache_cloud("power", level)
+
+    async def set_air_temperature(self, temp_c: float) -> None:
+        self._require()
+        # locale: °C -> mezzi gradi (intero); cloud: °C
+        raw = to_half_degrees(temp_c)
+        try:
+            await self._dispatch(
+                lambda: self._call(self._local_url(f"temperature/air/{raw}"), "temperature/air"),
+                lambda: self._call(self._cloud_url("SetTemperature", float(temp_c)), "SetTemperature"),
+            )
+        except WiNetApiError:
+            self._invalidate_cloud("setAir")
+            raise
+        self._cache_cloud("setAir", float(temp_c))
+
+    async def set_water_temperature(self, temp_c: float) -> None:
+        """Set water temperature (Local only)."""
+        self._require()
+        raw = to_half_degrees(temp_c)
+
+        async def _cloud() -> None:
+            raise WiNetApiError("Set temperatura acqua non supportato in Cloud (manca endpoint)")
+
+        await self._dispatch(
+            lambda: self._call(self._local_url(f"temperature/water/{raw}"), "temperature/water"),
+            _cloud,
+        )
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Generic, TypeVar
+
+_T = TypeVar("_T")
+
+
+class SingleFlight(Generic[_T]):
+    """Collapse concurrent calls of a fetch into shared runs.
+
+    A caller arriving while a run is in flight joins it. A caller that
+    needs data fetched after it asked (``fresh``) joins instead a single
+    trailing run, started as soon as the current one ends and shared by
+    every fresh caller that arrived meanwhile. At most one run is in flight
+    and one is waiting, however many callers there are.
+    """
+
+    def __init__(self, fetch: Callable[[], Awaitable[_T]]) -> None:
+        self._fetch = fetch
+        self._running: asyncio.Future[_T] | None = None
+        self._trailing: asyncio.Future[_T] | None = None
+        self.runs = 0
+        self.joined = 0
+
+    async def run(self, fresh: bool = False) -> _T:
+        if self._running is None:
+            future = self._start()
+        elif fresh:
+            self.joined += 1
+            if self._trailing is None:
+                self._trailing = asyncio.get_running_loop().create_future()
+            future = self._trailing
+        else:
+            self.joined += 1
+            future = self._running
+        # un chiamante cancellato non deve cancellare la richiesta condivisa
+        return await asyncio.shield(future)
+
+    def _start(self) -> asyncio.Future[_T]:
+        self.runs += 1
+        task = asyncio.ensure_future(self._fetch())
+        task.add_done_callback(self._done)
+        self._running = task
+        return task
+
+    def _done(self, task: asyncio.Future[_T]) -> None:
+        self._running = None
+        if not task.cancelled():
+            # segna l'eccezione come letta anche se tutti i chiamanti sono andati via
+            task.exception()
+
+        trailing, self._trailing = self._trailing, None
+        if trailing is None or trailing.done():
+            return
+        self._start().add_done_callback(lambda run: _copy_outcome(run, trailing))
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"runs": self.runs, "joined": self.joined}
+
+
+def _copy_outcome(source: asyncio.Future[_T], target: asyncio.Future[_T]) -> None:
+    if target.done():
+        return
+    if source.cancelled():
+        target.cancel()
+    elif (err := source.exception()) is not None:
+        target.set_exception(err)
+        # i chiamanti la ricevono comunque; evita il log "exception was never retrieved"
+        target.exception()
+    else:
+        target.set_result(source.result())
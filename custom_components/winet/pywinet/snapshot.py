@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+from .const import (
+    MODE_LOCAL,
+    STATUS_CODE_OFF,
+    STATUS_CODE_ON,
+    STATUS_MAP_LOCAL,
+    STATUS_MAP_CLOUD,
+    STATUS_ON_CODES,
+)
+
+# campi normalizzati (stessi nomi del payload locale)
+FIELDS = (
+    "status",
+    "description",
+    "power",
+    "air",
+    "setAir",
+    "water",
+    "setWater",
+    "gasflue",
+    "rpmExtractor",
+)
+
+# sotto questa soglia la sonda fumi non è significativa (stufa fredda)
+FLUE_FLOOR = 30
+
+
+def _missing(v: Any) -> bool:
+    return v is None or (isinstance(v, str) and v.strip() in ("", "---"))
+
+
+def half_degrees(v: Any) -> float | None:
+    """Convert raw temp (0.5°C units) to °C float.
+    Handles None / '---' / empty strings.
+    """
+    if _missing(v):
+        return None
+    try:
+        return float(v) / 2.0
+    except (TypeError, ValueError):
+        return None
+
+
+def to_half_degrees(temp_c: float) -> int:
+    """Convert °C to the raw 0.5°C units used by the local API."""
+    return int(round(float(temp_c) * 2))
+
+
+def number(v: Any) -> float | None:
+    if _missing(v):
+        return None
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def integer(v: Any) -> int | None:
+    n = number(v)
+    return None if n is None else int(n)
+
+
+def flue(v: Any) -> float | None:
+    n = number(v)
+    return None if n is None or n <= FLUE_FLOOR else n
+
+
+def rpm(v: Any) -> int:
+    n = integer(v)
+    return 0 if n is None else n
+
+
+def text(v: Any) -> str | None:
+    return None if v is None else str(v)
+
+
+Converter = Callable[[Any], Any]
+
+# campo -> (chiave in /api/global, convertitore)
+LOCAL_TABLE: dict[str, tuple[str, Converter]] = {
+    "status": ("status", integer),
+    "description": ("description", text),
+    "power": ("power", integer),
+    "air": ("air", half_degrees),
+    "setAir": ("setAir", half_degrees),
+    "water": ("water", half_degrees),
+    "setWater": ("setWater", half_degrees),
+    "gasflue": ("gasflue", flue),
+    "rpmExtractor": ("rpmExtractor", rpm),
+}
+
+# campo -> (endpoint cloud, chiave nella risposta, convertitore)
+CLOUD_TABLE: dict[str, tuple[str, str, Converter]] = {
+    "status": ("GetStatus", "Status", integer),
+    "power": ("GetPower", "Result", integer),
+    "air": ("GetActualTemperature", "Result", number),
+    "setAir": ("GetTemperature", "Result", number),
+}
+
+
+def status_label(mode: str, status: int | None) -> str | None:
+    if status is None:
+        return None
+    mapping = STATUS_MAP_LOCAL if mode == MODE_LOCAL else STATUS_MAP_CLOUD
+    return mapping.get(status, f"UNKNOWN ({status})")
+
+
+def status_code(mode: str, on: bool) -> int:
+    """Code shown for an on/off command in ``mode``'s status table."""
+    return STATUS_CODE_ON[mode] if on else STATUS_CODE_OFF
+
+
+def translate_status(status: int | None, source_mode: str, mode: str) -> int | None:
+    """Express a status code read over ``source_mode`` in ``mode``'s table.
+
+    Local and cloud number their states differently: the code with the
+    same label is used where ``mode`` has one, otherwise only on/off is kept.
+    """
+    if status is None or source_mode == mode:
+        return status
+    label = status_label(source_mode, status)
+    mapping = STATUS_MAP_LOCAL if mode == MODE_LOCAL else STATUS_MAP_CLOUD
+    for code, name in mapping.items():
+        if name == label:
+            return code
+    return status_code(mode, status in STATUS_ON_CODES[source_mode])
+
+
+def field_changed(old: Any, new: Any, deadband: float | None = None) -> bool:
+    """True if a field moved by at least ``deadband`` (any change without one)."""
+    if deadband is None or old is None or new is None:
+        return old != new
+    try:
+        return abs(float(new) - float(old)) >= deadband
+    except (TypeError, ValueError):
+        return old != new
+
+
+class WiNetSnapshot:
+    """Decoded stove state, built once per poll.
+
+    Field attributes use the payload names (``setAir``, ``rpmExtractor``...);
+    ``state`` and ``is_on`` are derived from ``status`` for the source mode.
+    ``restored`` marks a snapshot loaded from storage at startup.
+    """
+
+    __slots__ = (*FIELDS, "mode", "state", "is_on", "stale", "raw", "restored")
+
+    def __init__(
+        self,
+        mode: str,
+        values: dict[str, Any],
+        stale: frozenset[str] = frozenset(),
+        raw: dict[str, Any] | None = None,
+        restored: bool = False,
+    ) -> None:
+        self.mode = mode
+        for name in FIELDS:
+            setattr(self, name, values.get(name))
+        self.stale = frozenset(stale)
+        self.raw = raw
+        self.restored = restored
+        self.state = status_label(mode, self.status)
+        self.is_on = self.status in STATUS_ON_CODES[mode]
+
+    def values(self) -> dict[str, Any]:
+        return {name: getattr(self, name) for name in FIELDS}
+
+    def replace(self, **changes: Any) -> WiNetSnapshot:
+        values = self.values()
+        values.update(changes)
+        return WiNetSnapshot(self.mode, values, self.stale, self.raw, self.restored)
+
+    def to_storage(self) -> dict[str, Any]:
+        return {"mode": self.mode, "values": self.values()}
+
+    @classmethod
+    def from_storage(cls, data: dict[str, Any]) -> WiNetSnapshot:
+        return cls(data["mode"], data.get("values", {}), restored=True)
+
+    def as_dict(self) -> dict[str, Any]:
+        data = self.values()
+        data["mode"] = self.mode
+        data["state"] = self.state
+        data["stale"] = sorted(self.stale)
+        data["restored"] = self.restored
+        if self.raw is not None:
+            data["raw"] = self.raw
+        return data
+
+
+class FieldTracker:
+    """Fields that moved since they were last published to the entities.
+
+    A field counts as changed once it is at least its deadband away from
+    the value last published, so slow drifts still add up. Status codes
+    mean different states over local and cloud: a snapshot from another
+    source mode counts as every field changed.
+    """
+
+    def __init__(self, deadbands: dict[str, float] | None = None) -> None:
+        self.deadbands = deadbands or {}
+        self._mode: str | None = None
+        self._published: dict[str, Any] = {}
+
+    def reset(self) -> None:
+        """Publish every field on the next ``diff``."""
+        self._mode = None
+        self._published = {}
+
+    def diff(self, snapshot: WiNetSnapshot | None) -> set[str] | None:
+        """Changed fields, or None when every entity must write its state."""
+        if snapshot is None:
+            self.reset()
+            return None
+        if snapshot.mode != self._mode or not self._published:
+            self._mode = snapshot.mode
+            self._published = snapshot.values()
+            return None
+
+        changed: set[str] = set()
+        for name, value in snapshot.values().items():
+            if field_changed(self._published.get(name), value, self.deadbands.get(name)):
+                changed.add(name)
+                self._published[name] = value
+        return changed
+
+
+def decode_local(
+    data: dict[str, Any],
+    keep_raw: bool = False,
+    fields: frozenset[str] | None = None,
+) -> WiNetSnapshot:
+    """Decode ``/api/global``; with ``fields`` the others are left as None."""
+    values = {
+        name: conv(data.get(key))
+        for name, (key, conv) in LOCAL_TABLE.items()
+        if fields is None or name in fields
+    }
+    return WiNetSnapshot(MODE_LOCAL, values, raw=data if keep_raw else None)
+
+
+def decode_cloud_field(name: str, payload: dict[str, Any]) -> Any:
+    _endpoint, key, conv = CLOUD_TABLE[name]
+    return conv(payload.get(key))
@@ -6,30 +6,14 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import DOMAIN, CONF_HAS_WATER
+from .const import (
+    DOMAIN,
+    CONF_HAS_WATER,
+    FLUE_TREND_WINDOW,
+    AIR_TREND_WINDOW,
+)
 from .entity import WiNetEntity
-
-
-STATUS_MAP_LOCAL = {
-    0: "SPENTO",
-    1: "ACCESO",
-    2: "PULIZIA FINALE",
-    3: "ALARM",
-    4: "UNMANAGED",
-}
-
-STATUS_MAP_CLOUD = {
-    0: "SPENTO",
-    1: "ATTESA FIAMMA",
-    2: "ATTESA FIAMMA",
-    3: "ACCESO",
-    4: "ACCESO",
-    5: "STAND-BY",
-    6: "PULIZIA FINALE",
-    7: "PULIZIA BRACIERE",
-    8: "ALARM",
-    9: "ALARM",
-}
+from .pywinet.commands import PARAM_STATUS, PARAM_POWER, PARAM_SET_AIR, PARAM_SET_WATER
 
 
 async def async_setup_entry(
@@ -59,13 +43,31 @@ async def async_setup_entry(
     entities += [
         WiNetFlueTempSensor(coordinator, entry_id, mode),
         WiNetExtractorRpmSensor(coordinator, entry_id, mode),
+        WiNetPelletConsumptionSensor(coordinator, entry_id, mode),
+        WiNetHeatEnergySensor(coordinator, entry_id, mode),
+        WiNetHeatPowerSensor(coordinator, entry_id, mode),
+        WiNetFlueTrendSensor(coordinator, entry_id, mode),
+        WiNetAirTrendSensor(coordinator, entry_id, mode),
+        WiNetOnDurationSensor(coordinator, entry_id, mode),
+        WiNetOnTimeSensor(coordinator, entry_id, mode),
+        WiNetPollLatencySensor(coordinator, entry_id, mode, api),
+        WiNetErrorRateSensor(coordinator, entry_id, mode, api),
+        WiNetWriteBudgetSensor(coordinator, entry_id, mode, api, PARAM_STATUS, "On/Off"),
+        WiNetWriteBudgetSensor(coordinator, entry_id, mode, api, PARAM_POWER, "Power"),
+        WiNetWriteBudgetSensor(coordinator, entry_id, mode, api, PARAM_SET_AIR, "Air Setpoint"),
     ]
 
+    if has_water:
+        entities.append(
+            WiNetWriteBudgetSensor(coordinator, entry_id, mode, api, PARAM_SET_WATER, "Water Setpoint")
+        )
+
     async_add_entities(entities)
 
 
 class WiNetStatusSensor(WiNetEntity, SensorEntity):
     _attr_name = "WiNet Status"
+    _source_fields = ("status",)
 
     def __init__(self, coordinator, entry_id: str, mode: str):
         super().__init__(coordinator, entry_id, mode)
@@ -73,17 +75,14 @@ class WiNetStatusSensor(WiNetEntity, SensorEntity):
 
     @property
     def native_value(self):
-        st = self.coordinator.data.get("status")
-        if st is None:
-            return None
-        mapping = STATUS_MAP_LOCAL if self._mode == "local" else STATUS_MAP_CLOUD
-        return mapping.get(st, f"UNKNOWN ({st})")
+        return self.coordinator.data.state
 
 
 class WiNetAirTempSensor(WiNetEntity, SensorEntity):
     _attr_name = "WiNet Air Temperature"
     _attr_native_unit_of_measurement = "°C"
     _attr_device_class = "temperature"
+    _source_fields = ("air",)
 
     def __init__(self, coordinator, entry_id: str, mode: str):
         super().__init__(coordinator, entry_id, mode)
@@ -91,13 +90,14 @@ class WiNetAirTempSensor(WiNetEntity, SensorEntity):
 
     @property
     def native_value(self):
-        return self.coordinator.data.get("air")
+        return self.coordinator.data.air
 
 
 class WiNetSetAirTempSensor(WiNetEntity, SensorEntity):
     _attr_name = "WiNet Target Air Temperature"
     _attr_native_unit_of_measurement = "°C"
     _attr_device_class = "temperature"
+    _source_fields = ("setAir",)
 
     def __init__(self, coordinator, entry_id: str, mode: str):
         super().__init__(coordinator, entry_id, mode)
@@ -105,11 +105,12 @@ class WiNetSetAirTempSensor(WiNetEntity, SensorEntity):
 
     @property
     def native_value(self):
-        return self.coordinator.data.get("setAir")
+        return self.coordinator.data.setAir
 
 
 class WiNetPowerSensor(WiNetEntity, SensorEntity):
     _attr_name = "WiNet Power (reported)"
+    _source_fields = ("power",)
 
     def __init__(self, coordinator, entry_id: str, mode: str):
         super().__init__(coordinator, entry_id, mode)
@@ -117,7 +118,7 @@ class WiNetPowerSensor(WiNetEntity, SensorEntity):
 
     @property
     def native_value(self):
-        return self.coordinator.data.get("power")
+        return self.coordinator.data.power
 
 
 # ===== SENSORI OPZIONALI (ACQUA) =====
@@ -126,6 +127,7 @@ class WiNetWaterTempSensor(WiNetEntity, SensorEntity):
     _attr_name = "WiNet Water Temperature"
     _attr_native_unit_of_measurement = "°C"
     _attr_device_class = "temperature"
+    _source_fields = ("water",)
 
     def __init__(self, coordinator, entry_id: str, mode: str):
         super().__init__(coordinator, entry_id, mode)
@@ -133,14 +135,14 @@ class WiNetWaterTempSensor(WiNetEntity, SensorEntity):
 
     @property
     def native_value(self):
-        val = self.coordinator.data.get("water")
-        return None if val in (None, "---") else val
+        return self.coordinator.data.water
 
 
 class WiNetSetWaterTempSensor(WiNetEntity, SensorEntity):
     _attr_name = "WiNet Target Water Temperature"
     _attr_native_unit_of_measurement = "°C"
     _attr_device_class = "temperature"
+    _source_fields = ("setWater",)
 
     def __init__(self, coordinator, entry_id: str, mode: str):
         super().__init__(coordinator, entry_id, mode)
@@ -148,8 +150,7 @@ class WiNetSetWaterTempSensor(WiNetEntity, SensorEntity):
 
     @property
     def native_value(self):
-        val = self.coordinator.data.get("setWater")
-        return None if val in (None, "---") else val
+        return self.coordinator.data.setWater
 
 
 # ===== SENSORI DIAGNOSTICA (FUMI / RPM) =====
@@ -160,6 +161,7 @@ class WiNetFlueTempSensor(WiNetEntity, SensorEntity):
     _attr_device_class = "temperature"
     _attr_entity_category = EntityCategory.DIAGNOSTIC
     _attr_entity_registry_enabled_default = True
+    _source_fields = ("gasflue",)
 
     def __init__(self, coordinator, entry_id: str, mode: str):
         super().__init__(coordinator, entry_id, mode)
@@ -167,14 +169,8 @@ class WiNetFlueTempSensor(WiNetEntity, SensorEntity):
 
     @property
     def native_value(self):
-        val = self.coordinator.data.get("gasflue")
-        if val is None:
-            return None
-        try:
-            v = float(val)
-        except (TypeError, ValueError):
-            return None
-        return None if v <= 30 else v
+        # già filtrata dal decoder sotto la soglia minima
+        return self.coordinator.data.gasflue
 
 
 class WiNetExtractorRpmSensor(WiNetEntity, SensorEntity):
@@ -182,6 +178,7 @@ class WiNetExtractorRpmSensor(WiNetEntity, SensorEntity):
     _attr_native_unit_of_measurement = "rpm"
     _attr_entity_category = EntityCategory.DIAGNOSTIC
     _attr_entity_registry_enabled_default = True
+    _source_fields = ("rpmExtractor",)
 
     def __init__(self, coordinator, entry_id: str, mode: str):
         super().__init__(coordinator, entry_id, mode)
@@ -189,10 +186,247 @@ class WiNetExtractorRpmSensor(WiNetEntity, SensorEntity):
 
     @property
     def native_value(self):
-        val = self.coordinator.data.get("rpmExtractor")
-        if val is None:
-            return 0
-        try:
-            return int(float(val))
-        except (TypeError, ValueError):
-            return 0
+        val = self.coordinator.data.rpmExtractor
+        return 0 if val is None else val
+
+
+# ===== CONSUMI STIMATI (POTENZA x TEMPO DI COMBUSTIONE) =====
+
+class WiNetPelletConsumptionSensor(WiNetEntity, SensorEntity):
+    _attr_name = "WiNet Pellet Consumption"
+    _attr_native_unit_of_measurement = "kg"
+    _attr_device_class = "weight"
+    _attr_state_class = "total_increasing"
+
+    def __init__(self, coordinator, entry_id: str, mode: str):
+        super().__init__(coordinator, entry_id, mode)
+        self._attr_unique_id = f"{entry_id}_pellet_consumption"
+
+    @property
+    def native_value(self):
+        return round(self.coordinator.consumption.pellet_kg, 3)
+
+    @property
+    def extra_state_attributes(self):
+        meter = self.coordinator.consumption
+        return {
+            **(super().extra_state_attributes or {}),
+            "kg_per_hour": list(meter.pellet_rates),
+            "burn_hours_by_power": {
+                power: round(seconds / 3600, 2)
+                for power, seconds in sorted(meter.burn_seconds.items())
+            },
+        }
+
+
+class WiNetHeatEnergySensor(WiNetEntity, SensorEntity):
+    _attr_name = "WiNet Heat Energy"
+    _attr_native_unit_of_measurement = "kWh"
+    _attr_device_class = "energy"
+    _attr_state_class = "total_increasing"
+
+    def __init__(self, coordinator, entry_id: str, mode: str):
+        super().__init__(coordinator, entry_id, mode)
+        self._attr_unique_id = f"{entry_id}_heat_energy"
+
+    @property
+    def native_value(self):
+        return round(self.coordinator.consumption.heat_kwh, 3)
+
+    @property
+    def extra_state_attributes(self):
+        return {
+            **(super().extra_state_attributes or {}),
+            "kw": list(self.coordinator.consumption.heat_rates),
+        }
+
+
+class WiNetHeatPowerSensor(WiNetEntity, SensorEntity):
+    _attr_name = "WiNet Heat Output"
+    _attr_native_unit_of_measurement = "kW"
+    _attr_device_class = "power"
+    _attr_state_class = "measurement"
+
+    def __init__(self, coordinator, entry_id: str, mode: str):
+        super().__init__(coordinator, entry_id, mode)
+        self._attr_unique_id = f"{entry_id}_heat_output"
+
+    @property
+    def native_value(self):
+        return self.coordinator.consumption.heat_kw
+
+
+# ===== SENSORI DERIVATI (STORICO IN MEMORIA) =====
+
+class WiNetFlueTrendSensor(WiNetEntity, SensorEntity):
+    _attr_name = "WiNet Flue Temperature Trend"
+    _attr_native_unit_of_measurement = "°C/min"
+    _attr_state_class = "measurement"
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _fetch_fields = ("gasflue",)
+
+    def __init__(self, coordinator, entry_id: str, mode: str):
+        super().__init__(coordinator, entry_id, mode)
+        self._attr_unique_id = f"{entry_id}_flue_temperature_trend"
+
+    @property
+    def native_value(self):
+        slope = self.coordinator.history.slope("gasflue", FLUE_TREND_WINDOW)
+        return None if slope is None else round(slope * 60, 2)
+
+    @property
+    def extra_state_attributes(self):
+        history = self.coordinator.history
+        return {
+            **(super().extra_state_attributes or {}),
+            "min": history.min("gasflue", FLUE_TREND_WINDOW),
+            "max": history.max("gasflue", FLUE_TREND_WINDOW),
+            "window_s": FLUE_TREND_WINDOW,
+        }
+
+
+class WiNetAirTrendSensor(WiNetEntity, SensorEntity):
+    _attr_name = "WiNet Air Heat-up Rate"
+    _attr_native_unit_of_measurement = "°C/h"
+    _attr_state_class = "measurement"
+    _fetch_fields = ("air",)
+
+    def __init__(self, coordinator, entry_id: str, mode: str):
+        super().__init__(coordinator, entry_id, mode)
+        self._attr_unique_id = f"{entry_id}_air_heatup_rate"
+
+    @property
+    def native_value(self):
+        slope = self.coordinator.history.slope("air", AIR_TREND_WINDOW)
+        return None if slope is None else round(slope * 3600, 2)
+
+    @property
+    def extra_state_attributes(self):
+        mean = self.coordinator.history.mean("air", AIR_TREND_WINDOW)
+        return {
+            **(super().extra_state_attributes or {}),
+            "mean": None if mean is None else round(mean, 2),
+            "window_s": AIR_TREND_WINDOW,
+        }
+
+
+class WiNetOnDurationSensor(WiNetEntity, SensorEntity):
+    """Minuti dall'accensione (None a stufa spenta)."""
+
+    _attr_name = "WiNet Time Since Ignition"
+    _attr_native_unit_of_measurement = "min"
+    _attr_device_class = "duration"
+
+    def __init__(self, coordinator, entry_id: str, mode: str):
+        super().__init__(coordinator, entry_id, mode)
+        self._attr_unique_id = f"{entry_id}_time_since_ignition"
+
+    @property
+    def native_value(self):
+        history = self.coordinator.history
+        since = history.on_since()
+        if since is None or not self.coordinator.data.is_on:
+            return None
+        return round((history.last_ts - since) / 60)
+
+
+class WiNetOnTimeSensor(WiNetEntity, SensorEntity):
+    """Ore di funzionamento nelle ultime 24 h (totali per minuto, non lo storico)."""
+
+    _attr_name = "WiNet On Time (24h)"
+    _attr_native_unit_of_measurement = "h"
+    _attr_device_class = "duration"
+    _attr_state_class = "measurement"
+
+    def __init__(self, coordinator, entry_id: str, mode: str):
+        super().__init__(coordinator, entry_id, mode)
+        self._attr_unique_id = f"{entry_id}_on_time_24h"
+
+    @property
+    def native_value(self):
+        seconds = self.coordinator.on_time.total()
+        return None if seconds is None else round(seconds / 3600, 2)
+
+
+# ===== SENSORI DIAGNOSTICA (COMUNICAZIONE) =====
+
+class WiNetPollLatencySensor(WiNetEntity, SensorEntity):
+    _attr_name = "WiNet Poll Latency"
+    _attr_native_unit_of_measurement = "ms"
+    _attr_state_class = "measurement"
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator, entry_id: str, mode: str, api):
+        super().__init__(coordinator, entry_id, mode)
+        self._api = api
+        self._attr_unique_id = f"{entry_id}_poll_latency"
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    @property
+    def native_value(self):
+        """p95 della durata dei poll recenti."""
+        return self._api.metrics.poll.as_dict()["p95_ms"]
+
+    @property
+    def extra_state_attributes(self):
+        stats = self._api.metrics.poll.as_dict()
+        return {
+            **(super().extra_state_attributes or {}),
+            "p50_ms": stats["p50_ms"],
+            "p99_ms": stats["p99_ms"],
+        }
+
+
+class WiNetErrorRateSensor(WiNetEntity, SensorEntity):
+    _attr_name = "WiNet Poll Error Rate"
+    _attr_native_unit_of_measurement = "%"
+    _attr_state_class = "measurement"
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator, entry_id: str, mode: str, api):
+        super().__init__(coordinator, entry_id, mode)
+        self._api = api
+        self._attr_unique_id = f"{entry_id}_poll_error_rate"
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    @property
+    def native_value(self):
+        rate = self._api.metrics.poll.error_rate
+        return None if rate is None else round(rate * 100, 1)
+
+
+class WiNetWriteBudgetSensor(WiNetEntity, SensorEntity):
+    """Scritture ancora ammesse per un parametro (finestra più stretta)."""
+
+    _attr_native_unit_of_measurement = "writes"
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, coordinator, entry_id: str, mode: str, api, param: str, label: str):
+        super().__init__(coordinator, entry_id, mode)
+        self._api = api
+        self._param = param
+        self._attr_name = f"WiNet {label} Write Budget"
+        self._attr_unique_id = f"{entry_id}_write_budget_{param.lower()}"
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    @property
+    def native_value(self):
+        return self._api.budget.remaining(self._param)
+
+    @property
+    def extra_state_attributes(self):
+        attrs = dict(super().extra_state_attributes or {})
+        attrs.update(self._api.budget.as_dict()[self._param])
+        attrs["next_write_in"] = round(self._api.budget.delay(self._param))
+        return attrs
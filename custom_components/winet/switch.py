@@ -7,6 +7,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .const import DOMAIN
 from .entity import WiNetEntity
+from .pywinet.commands import PARAM_STATUS
 
 
 async def async_setup_entry(
@@ -21,6 +22,7 @@ async def async_setup_entry(
 
 class WiNetStoveSwitch(WiNetEntity, SwitchEntity):
     _attr_name = "WiNet Stove"
+    _source_fields = ("status",)
 
     def __init__(self, coordinator, entry_id: str, mode: str, api):
         super().__init__(coordinator, entry_id, mode)
@@ -29,15 +31,10 @@ class WiNetStoveSwitch(WiNetEntity, SwitchEntity):
 
     @property
     def is_on(self):
-        status = self.coordinator.data.get("status")
-        if self._mode == "local":
-            return status == 1
-        return status in (3, 4)
+        return self.coordinator.data.is_on
 
     async def async_turn_on(self, **kwargs):
-        await self._api.ignite()
-        await self.coordinator.async_request_refresh()
+        await self.coordinator.async_write(PARAM_STATUS, True)
 
     async def async_turn_off(self, **kwargs):
-        await self._api.shutdown()
-        await self.coordinator.async_request_refresh()
+        await self.coordinator.async_write(PARAM_STATUS, False)
@@ -0,0 +1,8 @@
+"""Test del client ``pywinet``: girano senza Home Assistant né aiohttp."""
+import sys
+from pathlib import Path
+
+# come in ``tools/``: il package vive dentro l'integrazione
+_CLIENT_ROOT = str(Path(__file__).resolve().parent.parent / "custom_components" / "winet")
+if _CLIENT_ROOT not in sys.path:
+    sys.path.insert(0, _CLIENT_ROOT)
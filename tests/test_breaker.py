@@ -0,0 +1,92 @@
+import asyncio
+from time import monotonic
+
+import pytest
+
+from pywinet.breaker import STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN, CircuitBreaker
+
+
+def _open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=2, backoff_base=10, backoff_max=25, jitter=0)
+    breaker.record_failure()
+    breaker.record_failure()
+    return breaker
+
+
+def _expire(breaker: CircuitBreaker) -> None:
+    breaker.next_probe_at = monotonic() - 1
+
+
+def test_opens_after_threshold_and_rejects():
+    breaker = CircuitBreaker(failure_threshold=2, jitter=0)
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+
+
+def test_half_open_lets_a_single_probe_through():
+    breaker = _open_breaker()
+    _expire(breaker)
+    assert breaker.allow()
+    assert breaker.state == STATE_HALF_OPEN
+    assert not breaker.allow()
+
+
+def test_probe_success_closes():
+    breaker = _open_breaker()
+    _expire(breaker)
+    breaker.allow()
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.failures == 0
+    assert breaker.backoff == 10
+
+
+def test_probe_failure_doubles_backoff_up_to_max():
+    breaker = _open_breaker()
+    for expected in (20, 25):
+        _expire(breaker)
+        breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == STATE_OPEN
+        assert breaker.backoff == expected
+    assert breaker.opened == 3
+
+
+def test_release_frees_the_probe_slot():
+    breaker = _open_breaker()
+    _expire(breaker)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_probe_cancelled_while_waiting_for_limiter_is_released():
+    protocol = pytest.importorskip("pywinet.protocol")
+
+    async def scenario():
+        # limite globale esaurito: la richiesta resta in attesa senza toccare la rete
+        client = protocol.WiNetClient(
+            mode="local", host="127.0.0.1", limiter=asyncio.Semaphore(0)
+        )
+        breaker = client.breakers["local"]
+        breaker.failure_threshold = 1
+        breaker.record_failure()
+        _expire(breaker)
+        probe = asyncio.create_task(
+            client._request_once(client._local_url("global"), "global", "timeout")
+        )
+        await asyncio.sleep(0)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        await client.async_close()
+        return breaker
+
+    breaker = asyncio.run(scenario())
+    assert breaker.state == STATE_HALF_OPEN
+    assert breaker.allow()
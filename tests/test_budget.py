@@ -0,0 +1,60 @@
+import pytest
+
+from pywinet.budget import HOUR, WriteBudget
+from pywinet.commands import PARAM_POWER, PARAM_STATUS
+
+NOW = 1_000_000.0
+
+
+def _budget(limit: int = 4) -> WriteBudget:
+    return WriteBudget({PARAM_POWER: ((HOUR, limit),)}, reserve=0.25)
+
+
+def test_unbudgeted_param_is_never_held():
+    budget = _budget()
+    assert budget.remaining(PARAM_STATUS, NOW) is None
+    assert budget.delay(PARAM_STATUS, NOW) == 0.0
+
+
+def test_plenty_left_goes_out_at_once():
+    budget = _budget()
+    budget.record(PARAM_POWER, NOW)
+    assert budget.remaining(PARAM_POWER, NOW) == 3
+    assert budget.delay(PARAM_POWER, NOW) == 0.0
+
+
+def test_reserve_spaces_writes():
+    budget = _budget()
+    for offset in range(3):
+        budget.record(PARAM_POWER, NOW + offset)
+    # un solo slot rimasto (sotto la riserva): scritture distanziate di window / limit
+    assert budget.delay(PARAM_POWER, NOW + 2) == pytest.approx(HOUR / 4)
+
+
+def test_exhausted_window_waits_for_oldest_write():
+    budget = _budget()
+    for offset in range(4):
+        budget.record(PARAM_POWER, NOW + offset)
+    assert budget.remaining(PARAM_POWER, NOW + 10) == 0
+    assert budget.delay(PARAM_POWER, NOW + 10) == pytest.approx(HOUR - 10)
+    assert budget.delay(PARAM_POWER, NOW + HOUR + 1) == 0.0
+
+
+def test_storage_round_trip_drops_expired_writes(monkeypatch):
+    budget = _budget()
+    budget.record(PARAM_POWER, NOW - 2 * HOUR)
+    budget.record(PARAM_POWER, NOW - 60)
+
+    monkeypatch.setattr("pywinet.budget.time.time", lambda: NOW)
+    restored = _budget()
+    restored.load(budget.to_storage())
+    assert restored.remaining(PARAM_POWER, NOW) == 3
+    assert restored.as_dict(NOW) == {PARAM_POWER: {f"{HOUR}s": {"used": 1, "limit": 4}}}
+
+
+def test_remaining_never_goes_negative():
+    budget = WriteBudget({PARAM_STATUS: ((HOUR, 2),)})
+    for offset in range(4):
+        budget.record(PARAM_STATUS, NOW + offset)
+    assert budget.remaining(PARAM_STATUS, NOW + 10) == 0
+    assert budget.as_dict(NOW + 10) == {PARAM_STATUS: {f"{HOUR}s": {"used": 4, "limit": 2}}}
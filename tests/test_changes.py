@@ -0,0 +1,52 @@
+from pywinet.const import MODE_CLOUD, MODE_LOCAL
+from pywinet.snapshot import FieldTracker, WiNetSnapshot, field_changed
+
+
+def _local(**values) -> WiNetSnapshot:
+    return WiNetSnapshot(MODE_LOCAL, {"status": 1, "power": 3, "air": 20.0, **values})
+
+
+def test_field_changed_respects_deadband():
+    assert not field_changed(20.0, 20.2, 0.5)
+    assert field_changed(20.0, 20.5, 0.5)
+    assert field_changed(None, 20.0, 0.5)
+    assert field_changed("ACCESO", "SPENTO")
+
+
+def test_first_snapshot_publishes_everything():
+    assert FieldTracker().diff(_local()) is None
+
+
+def test_only_moved_fields_are_reported():
+    tracker = FieldTracker({"air": 0.5})
+    tracker.diff(_local())
+    assert tracker.diff(_local()) == set()
+    assert tracker.diff(_local(power=4, air=20.2)) == {"power"}
+
+
+def test_drift_is_measured_from_the_published_value():
+    tracker = FieldTracker({"air": 0.5})
+    tracker.diff(_local())
+    assert tracker.diff(_local(air=20.3)) == set()
+    # 20.3 non è stato pubblicato: lo scarto si accumula rispetto a 20.0
+    assert tracker.diff(_local(air=20.6)) == {"air"}
+    assert tracker.diff(_local(air=20.8)) == set()
+
+
+def test_source_mode_change_republishes_everything():
+    tracker = FieldTracker()
+    tracker.diff(_local(status=1))
+    # stesso codice, altro significato: 1 è ACCESO in locale, ATTESA FIAMMA in cloud
+    cloud = WiNetSnapshot(MODE_CLOUD, {"status": 1, "power": 3, "air": 20.0})
+    assert cloud.state != _local(status=1).state
+    assert tracker.diff(cloud) is None
+    assert tracker.diff(cloud) == set()
+
+
+def test_reset_and_missing_snapshot_republish_everything():
+    tracker = FieldTracker()
+    tracker.diff(_local())
+    tracker.reset()
+    assert tracker.diff(_local()) is None
+    assert tracker.diff(None) is None
+    assert tracker.diff(_local()) is None
@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+
+protocol = pytest.importorskip("pywinet.protocol")
+
+from pywinet.const import MODE_CLOUD  # noqa: E402
+
+PAYLOADS = {
+    "GetStatus": {"Status": 3},
+    "GetPower": {"Result": 4},
+    "GetActualTemperature": {"Result": 19.5},
+    "GetTemperature": {"Result": 21},
+}
+
+
+class _Cloud:
+    """Fake cloud endpoints: records calls and concurrency, can fail or hang."""
+
+    def __init__(self, failing=(), hanging=()):
+        self.failing = set(failing)
+        self.hanging = set(hanging)
+        self.calls: list[str] = []
+        self.active = 0
+        self.max_active = 0
+
+    async def get_json(self, url, endpoint):
+        self.calls.append(endpoint)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            if endpoint in self.hanging:
+                await asyncio.sleep(3600)
+            if endpoint in self.failing:
+                raise protocol.WiNetApiError(f"HTTP 500 su {endpoint}")
+            return PAYLOADS[endpoint]
+        finally:
+            self.active -= 1
+
+
+def _client(cloud: _Cloud, **kwargs) -> "protocol.WiNetClient":
+    client = protocol.WiNetClient(mode=MODE_CLOUD, stove_id="test", **kwargs)
+    client._get_json = cloud.get_json
+    return client
+
+
+def test_endpoints_are_fetched_concurrently():
+    cloud = _Cloud()
+    snapshot = asyncio.run(_client(cloud)._fetch_cloud())
+    assert cloud.max_active == 4
+    assert (snapshot.status, snapshot.power, snapshot.air, snapshot.setAir) == (3, 4, 19.5, 21.0)
+    assert snapshot.is_on
+    assert snapshot.stale == frozenset()
+
+
+def test_failing_endpoint_keeps_last_value_as_stale():
+    async def scenario():
+        cloud = _Cloud()
+        client = _client(cloud)
+        await client._fetch_cloud()
+        client._cloud_fresh_until.clear()
+        cloud.failing = {"GetActualTemperature"}
+        return await client._fetch_cloud()
+
+    snapshot = asyncio.run(scenario())
+    assert snapshot.stale == frozenset({"air"})
+    assert snapshot.air == 19.5
+    assert snapshot.status == 3
+
+
+def test_poll_fails_only_when_every_endpoint_fails():
+    cloud = _Cloud(failing=PAYLOADS)
+    with pytest.raises(protocol.WiNetApiError):
+        asyncio.run(_client(cloud)._fetch_cloud())
+
+
+def test_hanging_endpoint_is_cut_at_the_deadline():
+    cloud = _Cloud(hanging={"GetStatus"})
+    client = _client(cloud, request_timeout=0.1)
+    snapshot = asyncio.run(asyncio.wait_for(client._fetch_cloud(), 2))
+    assert snapshot.stale == frozenset({"status"})
+    assert snapshot.power == 4
+
+
+def test_slow_fields_are_served_from_cache_within_ttl():
+    async def scenario():
+        cloud = _Cloud()
+        client = _client(cloud)
+        await client._fetch_cloud()
+        cloud.calls.clear()
+        return cloud, await client._fetch_cloud()
+
+    cloud, snapshot = asyncio.run(scenario())
+    assert sorted(cloud.calls) == ["GetActualTemperature", "GetStatus"]
+    assert snapshot.power == 4
+    assert snapshot.setAir == 21.0
+
+
+def test_poll_with_every_wanted_field_cached_makes_no_call():
+    async def scenario():
+        cloud = _Cloud()
+        client = _client(cloud)
+        client.wanted_fields = frozenset({"power", "setAir"})
+        await client._fetch_cloud()
+        cloud.calls.clear()
+        return cloud, await client._fetch_cloud()
+
+    cloud, snapshot = asyncio.run(scenario())
+    assert cloud.calls == []
+    assert (snapshot.power, snapshot.setAir) == (4, 21.0)
+    assert snapshot.status is None
+
+
+def test_unwanted_endpoints_are_not_called():
+    cloud = _Cloud()
+    client = _client(cloud)
+    client.wanted_fields = frozenset({"status", "air"})
+    asyncio.run(client._fetch_cloud())
+    assert sorted(cloud.calls) == ["GetActualTemperature", "GetStatus"]
+
+
+def test_write_refreshes_the_cached_value():
+    async def scenario():
+        cloud = _Cloud()
+        client = _client(cloud)
+
+        async def call(url, endpoint):
+            cloud.calls.append(endpoint)
+
+        client._call = call
+        await client._fetch_cloud()
+        await client.set_power(2)
+        cloud.calls.clear()
+        return cloud, await client._fetch_cloud()
+
+    cloud, snapshot = asyncio.run(scenario())
+    assert "GetPower" not in cloud.calls
+    assert snapshot.power == 2
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from pywinet.budget import HOUR, WriteBudget
+from pywinet.commands import (
+    PARAM_POWER,
+    PARAM_SET_AIR,
+    PARAM_STATUS,
+    CommandSuperseded,
+    WiNetCommandQueue,
+)
+
+
+def _queue(debounce: float = 0.0, budget: WriteBudget | None = None):
+    sent: list[tuple[str, object]] = []
+
+    async def send(param, value):
+        sent.append((param, value))
+
+    return WiNetCommandQueue(send, min_gap=0, debounce=debounce, budget=budget), sent
+
+
+def test_newer_value_replaces_pending_write():
+    async def scenario():
+        queue, sent = _queue(debounce=0.05)
+        queue.submit(PARAM_POWER, 2)
+        await queue.async_write(PARAM_POWER, 3)
+        return queue, sent
+
+    queue, sent = asyncio.run(scenario())
+    assert sent == [(PARAM_POWER, 3)]
+    assert queue.coalesced == 1
+    assert queue.sent == 1
+
+
+def test_on_off_supersedes_pending_setpoint():
+    async def scenario():
+        queue, sent = _queue(debounce=10)
+        events = []
+        queue.add_listener(lambda param, value, error: events.append((param, value, error)))
+        waiter = queue.submit(PARAM_SET_AIR, 21, wait=True)
+        await queue.async_write(PARAM_STATUS, False)
+        with pytest.raises(CommandSuperseded):
+            await waiter
+        return queue, sent, events
+
+    queue, sent, events = asyncio.run(scenario())
+    assert sent == [(PARAM_STATUS, False)]
+    assert queue.superseded == 1
+    assert isinstance(events[0][2], CommandSuperseded)
+    assert events[1] == (PARAM_STATUS, False, None)
+
+
+def test_batch_sends_on_off_first_without_dropping_setpoints():
+    async def scenario():
+        queue, sent = _queue(debounce=10)
+        await queue.submit_batch({PARAM_SET_AIR: 22, PARAM_STATUS: True}, wait=True)
+        return queue, sent
+
+    queue, sent = asyncio.run(scenario())
+    assert sent == [(PARAM_STATUS, True), (PARAM_SET_AIR, 22)]
+    assert queue.superseded == 0
+
+
+def test_send_error_reaches_waiter_and_listener():
+    async def scenario():
+        async def send(param, value):
+            raise OSError("unreachable")
+
+        queue = WiNetCommandQueue(send, min_gap=0, debounce=0)
+        errors = []
+        queue.add_listener(lambda param, value, error: errors.append(error))
+        with pytest.raises(OSError):
+            await queue.async_write(PARAM_POWER, 4)
+        return queue, errors
+
+    queue, errors = asyncio.run(scenario())
+    assert queue.failed == 1
+    assert isinstance(errors[0], OSError)
+
+
+def test_exhausted_budget_holds_setpoints_but_not_on_off():
+    async def scenario():
+        budget = WriteBudget({PARAM_POWER: ((HOUR, 1),), PARAM_STATUS: ((HOUR, 1),)})
+        budget.record(PARAM_POWER)
+        budget.record(PARAM_STATUS)
+        queue, sent = _queue(budget=budget)
+        queue.submit(PARAM_POWER, 5)
+        await asyncio.sleep(0.05)
+        held = (list(sent), queue.depth, queue.deferred)
+        await queue.async_write(PARAM_STATUS, True)
+        await queue.async_close()
+        return held, sent
+
+    (held_sent, depth, deferred), sent = asyncio.run(scenario())
+    assert held_sent == []
+    assert depth == 1
+    assert deferred == 1
+    assert sent == [(PARAM_STATUS, True)]
+
+
+def test_close_during_send_releases_waiters():
+    async def scenario():
+        started = asyncio.Event()
+
+        async def send(param, value):
+            started.set()
+            await asyncio.sleep(3600)
+
+        queue = WiNetCommandQueue(send, min_gap=0, debounce=0)
+        writer = asyncio.create_task(queue.async_write(PARAM_STATUS, True))
+        await started.wait()
+        await queue.async_close()
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(writer, 1)
+
+    asyncio.run(scenario())
@@ -0,0 +1,68 @@
+import pytest
+
+from pywinet.const import MODE_LOCAL
+from pywinet.consumption import ConsumptionMeter
+from pywinet.snapshot import WiNetSnapshot
+
+PELLET = (0.8, 1.1, 1.4, 1.7, 2.0)
+HEAT = (3.0, 4.5, 6.0, 7.5, 9.0)
+
+
+def _stove(on: bool, power: int | None = 3) -> WiNetSnapshot:
+    return WiNetSnapshot(MODE_LOCAL, {"status": 1 if on else 0, "power": power})
+
+
+def test_burning_time_is_charged_at_the_previous_power():
+    meter = ConsumptionMeter(PELLET, HEAT)
+    assert not meter.update(_stove(True, 3), ts=0)
+    assert meter.update(_stove(True, 5), ts=360)
+    assert meter.pellet_kg == pytest.approx(1.4 * 0.1)
+    assert meter.heat_kwh == pytest.approx(6.0 * 0.1)
+    assert meter.burn_seconds == {3: 360}
+    assert meter.heat_kw == 9.0
+
+
+def test_nothing_is_charged_while_off():
+    meter = ConsumptionMeter(PELLET, HEAT)
+    meter.update(_stove(False), ts=0)
+    assert not meter.update(_stove(True), ts=3600)
+    assert meter.pellet_kg == 0.0
+    assert meter.heat_kw == 6.0
+
+
+def test_long_gap_counts_only_up_to_max_gap():
+    meter = ConsumptionMeter(PELLET, HEAT, max_gap=600)
+    meter.update(_stove(True, 1), ts=0)
+    meter.update(_stove(True, 1), ts=7200)
+    assert meter.burn_seconds == {1: 600}
+    assert meter.pellet_kg == pytest.approx(0.8 / 6)
+
+
+def test_time_going_backwards_is_ignored():
+    meter = ConsumptionMeter(PELLET, HEAT)
+    meter.update(_stove(True), ts=100)
+    assert not meter.update(_stove(True), ts=50)
+    assert meter.pellet_kg == 0.0
+
+
+def test_out_of_range_power_uses_the_nearest_rate():
+    meter = ConsumptionMeter(PELLET, HEAT)
+    meter.update(_stove(True, 9), ts=0)
+    meter.update(_stove(True, 9), ts=3600 * 0.1)
+    assert meter.pellet_kg == pytest.approx(2.0 * 0.1)
+
+
+def test_heat_kw_unknown_before_first_sample():
+    assert ConsumptionMeter(PELLET, HEAT).heat_kw is None
+
+
+def test_totals_survive_storage():
+    meter = ConsumptionMeter(PELLET, HEAT)
+    meter.update(_stove(True, 2), ts=0)
+    meter.update(_stove(True, 2), ts=600)
+
+    restored = ConsumptionMeter(PELLET, HEAT)
+    restored.load(meter.to_storage())
+    assert restored.pellet_kg == pytest.approx(meter.pellet_kg)
+    assert restored.heat_kwh == pytest.approx(meter.heat_kwh)
+    assert restored.burn_seconds == {2: 600.0}
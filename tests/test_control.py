@@ -0,0 +1,70 @@
+from pywinet.commands import PARAM_POWER, PARAM_STATUS
+from pywinet.const import LOOP_HYSTERESIS, LOOP_PI
+from pywinet.control import (
+    HYSTERESIS,
+    MIN_OFF_TIME,
+    MIN_ON_TIME,
+    POWER_STEP_INTERVAL,
+    HeatingController,
+)
+
+TARGET = 20.0
+COLD = TARGET - HYSTERESIS - 1
+HOT = TARGET + HYSTERESIS + 1
+
+
+def test_ignites_when_cold_and_idle():
+    controller = HeatingController()
+    assert controller.decide(0, COLD, TARGET, "SPENTO", False, 3) == {PARAM_STATUS: True}
+
+
+def test_never_ignites_outside_idle_states():
+    controller = HeatingController()
+    for state in ("PULIZIA FINALE", "ALARM", "ATTESA FIAMMA", None):
+        assert controller.decide(0, COLD, TARGET, state, False, 3) == {}
+
+
+def test_requested_ignition_starts_min_off_time():
+    controller = HeatingController()
+    assert controller.decide(0, COLD, TARGET, "SPENTO", False, 3) == {PARAM_STATUS: True}
+    # la stufa non ha ancora recepito il comando: non si ripete
+    assert controller.decide(15, COLD, TARGET, "SPENTO", False, 3) == {}
+    assert controller.decide(MIN_OFF_TIME, COLD, TARGET, "SPENTO", False, 3) == {
+        PARAM_STATUS: True
+    }
+
+
+def test_shutdown_waits_min_on_time():
+    controller = HeatingController(LOOP_HYSTERESIS)
+    controller.decide(0, TARGET, TARGET, "SPENTO", False, 3)
+    controller.decide(10, TARGET, TARGET, "ACCESO", True, 3)
+    assert controller.decide(20, HOT, TARGET, "ACCESO", True, 3) == {}
+    assert controller.decide(10 + MIN_ON_TIME, HOT, TARGET, "ACCESO", True, 3) == {
+        PARAM_STATUS: False
+    }
+
+
+def test_no_change_inside_band():
+    controller = HeatingController()
+    assert controller.decide(0, TARGET, TARGET, "SPENTO", False, 3) == {}
+    assert controller.decide(0, TARGET, TARGET, "ACCESO", True, 3) == {}
+
+
+def test_pi_steps_one_level_at_a_time():
+    controller = HeatingController(LOOP_PI)
+    # avvio senza scatti sulla potenza attuale
+    assert controller.decide(0, TARGET, TARGET, "ACCESO", True, 3) == {}
+    cold = TARGET - 1.5
+    assert controller.decide(POWER_STEP_INTERVAL, cold, TARGET, "ACCESO", True, 3) == {
+        PARAM_POWER: 4
+    }
+    assert controller.decide(POWER_STEP_INTERVAL + 30, cold, TARGET, "ACCESO", True, 4) == {}
+    assert controller.decide(2 * POWER_STEP_INTERVAL, cold, TARGET, "ACCESO", True, 4) == {
+        PARAM_POWER: 5
+    }
+
+
+def test_hysteresis_loop_leaves_power_alone():
+    controller = HeatingController(LOOP_HYSTERESIS)
+    controller.decide(0, TARGET, TARGET, "ACCESO", True, 3)
+    assert controller.decide(POWER_STEP_INTERVAL, TARGET - 1.5, TARGET, "ACCESO", True, 3) == {}
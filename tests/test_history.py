@@ -0,0 +1,83 @@
+import pytest
+
+from pywinet.const import MODE_LOCAL
+from pywinet.history import OnTimeWindow, SampleHistory
+from pywinet.snapshot import WiNetSnapshot
+
+
+def _sample(air=None, on=True, gasflue=None) -> WiNetSnapshot:
+    return WiNetSnapshot(
+        MODE_LOCAL, {"status": 1 if on else 0, "air": air, "gasflue": gasflue}
+    )
+
+
+def test_ring_buffer_keeps_the_newest_samples():
+    history = SampleHistory(3)
+    for ts in range(5):
+        history.append(_sample(air=float(ts)), ts=ts)
+    assert len(history) == 3
+    assert history.last_ts == 4
+    assert [value for _ts, value in history.values("air")] == [4.0, 3.0, 2.0]
+
+
+def test_queries_skip_missing_values_and_respect_the_window():
+    history = SampleHistory(10)
+    history.append(_sample(air=18.0), ts=0)
+    history.append(_sample(air=None), ts=10)
+    history.append(_sample(air=20.0), ts=20)
+    history.append(_sample(air=22.0), ts=30)
+    assert history.min("air") == 18.0
+    assert history.max("air", seconds=10) == 22.0
+    assert history.mean("air", seconds=15) == pytest.approx(21.0)
+    assert history.mean("gasflue") is None
+
+
+def test_slope_in_units_per_second():
+    history = SampleHistory(10)
+    for ts in range(0, 60, 10):
+        history.append(_sample(air=20.0 + ts / 60), ts=ts)
+    assert history.slope("air") == pytest.approx(1 / 60)
+    single = SampleHistory(10)
+    single.append(_sample(air=20.0), ts=0)
+    assert single.slope("air") is None
+
+
+def test_time_in_state_and_on_since():
+    history = SampleHistory(10)
+    for ts, on in ((0, False), (10, True), (20, True), (30, False), (40, True), (50, True)):
+        history.append(_sample(on=on), ts=ts)
+    # ogni valore vale fino al campione successivo
+    assert history.time_in_state(bool) == 30
+    assert history.time_in_state(bool, seconds=15) == 10
+    assert history.on_since() == 40
+
+
+def test_on_time_window_sums_whole_buckets():
+    window = OnTimeWindow(window=3600, bucket=60)
+    window.append(True, ts=0)
+    window.append(False, ts=90)
+    window.append(True, ts=600)
+    window.append(True, ts=630)
+    assert window.total() == 120
+
+
+def test_on_time_window_forgets_what_left_the_window():
+    window = OnTimeWindow(window=600, bucket=60)
+    window.append(True, ts=0)
+    window.append(False, ts=300)
+    assert window.total() == 300
+    assert window.total(now=659) == 240
+    assert window.total(now=2000) == 0
+
+
+def test_on_time_window_covers_a_day_with_constant_memory():
+    day = 24 * 3600
+    window = OnTimeWindow(window=day)
+    for ts in range(0, 2 * day, 15):
+        window.append(ts % 7200 < 3600, ts=ts)
+    assert window.slots == 1440
+    assert window.total() == pytest.approx(day / 2, abs=60)
+
+
+def test_on_time_window_is_empty_before_samples():
+    assert OnTimeWindow(window=600).total() is None
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from pywinet.singleflight import SingleFlight
+
+
+class _Fetcher:
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        call = self.calls
+        await self.release.wait()
+        return call
+
+
+def test_concurrent_callers_share_one_run():
+    async def scenario():
+        fetch = _Fetcher()
+        flight = SingleFlight(fetch)
+        callers = [asyncio.create_task(flight.run()) for _ in range(3)]
+        await asyncio.sleep(0)
+        fetch.release.set()
+        return flight, await asyncio.gather(*callers)
+
+    flight, results = asyncio.run(scenario())
+    assert results == [1, 1, 1]
+    assert flight.as_dict() == {"runs": 1, "joined": 2}
+
+
+def test_fresh_callers_share_one_trailing_run():
+    async def scenario():
+        fetch = _Fetcher()
+        flight = SingleFlight(fetch)
+        first = asyncio.create_task(flight.run())
+        await asyncio.sleep(0)
+        fresh = [asyncio.create_task(flight.run(fresh=True)) for _ in range(2)]
+        await asyncio.sleep(0)
+        fetch.release.set()
+        return flight, await first, await asyncio.gather(*fresh)
+
+    flight, first, fresh = asyncio.run(scenario())
+    assert first == 1
+    assert fresh == [2, 2]
+    assert flight.runs == 2
+
+
+def test_error_reaches_every_caller():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            raise OSError("timeout")
+
+        flight = SingleFlight(fetch)
+        callers = [asyncio.create_task(flight.run()) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*callers, return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, OSError) for result in results)
+
+
+def test_cancelled_caller_does_not_cancel_shared_run():
+    async def scenario():
+        fetch = _Fetcher()
+        flight = SingleFlight(fetch)
+        leaving = asyncio.create_task(flight.run())
+        staying = asyncio.create_task(flight.run())
+        await asyncio.sleep(0)
+        leaving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        fetch.release.set()
+        return await staying
+
+    assert asyncio.run(scenario()) == 1
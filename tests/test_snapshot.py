@@ -0,0 +1,96 @@
+from pywinet.const import MODE_CLOUD, MODE_LOCAL
+from pywinet.snapshot import (
+    FIELDS,
+    WiNetSnapshot,
+    decode_cloud_field,
+    decode_local,
+    status_code,
+    to_half_degrees,
+    translate_status,
+)
+
+GLOBAL = {
+    "status": 1,
+    "description": "ACCESO",
+    "power": "3",
+    "air": 41,
+    "setAir": "44",
+    "water": "---",
+    "setWater": "",
+    "gasflue": "120.5",
+    "rpmExtractor": "1650",
+}
+
+
+def test_local_payload_is_decoded_once():
+    snapshot = decode_local(GLOBAL)
+    assert snapshot.mode == MODE_LOCAL
+    assert (snapshot.status, snapshot.power) == (1, 3)
+    # mezzi gradi -> °C
+    assert (snapshot.air, snapshot.setAir) == (20.5, 22.0)
+    assert snapshot.gasflue == 120.5
+    assert snapshot.rpmExtractor == 1650
+    assert (snapshot.state, snapshot.is_on) == ("ACCESO", True)
+    assert snapshot.raw is None
+
+
+def test_firmware_placeholders_become_none():
+    snapshot = decode_local(GLOBAL)
+    assert snapshot.water is None
+    assert snapshot.setWater is None
+
+
+def test_cold_flue_and_missing_rpm():
+    snapshot = decode_local({**GLOBAL, "gasflue": "25", "rpmExtractor": None})
+    assert snapshot.gasflue is None
+    assert snapshot.rpmExtractor == 0
+
+
+def test_unknown_status_codes_are_labelled_not_dropped():
+    local = decode_local({**GLOBAL, "status": 42})
+    assert local.status == 42
+    assert local.state == "UNKNOWN (42)"
+    assert not local.is_on
+    assert decode_local({**GLOBAL, "status": "---"}).state is None
+
+
+def test_only_wanted_fields_are_decoded():
+    snapshot = decode_local(GLOBAL, fields=frozenset({"status", "air"}))
+    assert snapshot.air == 20.5
+    assert snapshot.power is None
+
+
+def test_keep_raw_keeps_the_payload():
+    assert decode_local(GLOBAL, keep_raw=True).raw is GLOBAL
+
+
+def test_cloud_fields_and_status_table():
+    assert decode_cloud_field("air", {"Result": "19.5"}) == 19.5
+    assert decode_cloud_field("power", {"Result": None}) is None
+    snapshot = WiNetSnapshot(MODE_CLOUD, {"status": 4})
+    assert (snapshot.state, snapshot.is_on) == ("ACCESO", True)
+
+
+def test_status_codes_across_tables():
+    assert status_code(MODE_LOCAL, True) == 1
+    assert status_code(MODE_CLOUD, True) == 3
+    assert status_code(MODE_CLOUD, False) == 0
+    # stessa etichetta dove esiste, altrimenti solo acceso/spento
+    assert translate_status(3, MODE_LOCAL, MODE_CLOUD) == 8
+    assert translate_status(5, MODE_CLOUD, MODE_LOCAL) == 0
+    assert translate_status(4, MODE_CLOUD, MODE_LOCAL) == 1
+    assert translate_status(None, MODE_CLOUD, MODE_LOCAL) is None
+
+
+def test_replace_and_storage_round_trip():
+    snapshot = decode_local(GLOBAL).replace(power=5)
+    assert snapshot.power == 5
+    restored = WiNetSnapshot.from_storage(snapshot.to_storage())
+    assert restored.restored
+    assert restored.values() == snapshot.values()
+    assert set(restored.as_dict()) >= {*FIELDS, "mode", "state", "stale", "restored"}
+
+
+def test_half_degree_conversion():
+    assert to_half_degrees(21.5) == 43
+    assert to_half_degrees(20.26) == 41
@@ -0,0 +1,9 @@
+"""Strumenti di sviluppo per l'integrazione WiNet (emulatore, benchmark, CLI, replay)."""
+import sys
+from pathlib import Path
+
+# il client senza Home Assistant (package ``pywinet``) vive dentro l'integrazione:
+# importarlo da lì non deve eseguire ``custom_components/winet/__init__.py``
+_CLIENT_ROOT = str(Path(__file__).resolve().parent.parent / "custom_components" / "winet")
+if _CLIENT_ROOT not in sys.path:
+    sys.path.insert(0, _CLIENT_ROOT)
@@ -0,0 +1,145 @@
+"""Benchmark offline di WiNetApi contro l'emulatore (modalità locale e cloud).
+
+Uso:
+    python -m tools.benchmark --polls 200 --commands 50 --latency 0.05 --jitter 0.02
+
+Per ogni modalità riporta i percentili di latenza del poll (``get_all``),
+i comandi al secondo attraverso la coda comandi e il tempo CPU del loop per
+poll. L'emulatore gira in un processo separato: il tempo CPU misurato è solo
+quello del client. Con ``--json`` stampa i risultati in JSON (utile per confrontare run).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+from typing import Any
+
+import aiohttp
+
+from pywinet.protocol import WiNetApiError, WiNetClient
+from pywinet.commands import PARAM_POWER
+from pywinet.const import MODE_LOCAL, MODE_CLOUD
+from pywinet.metrics import percentile
+
+from .emulator import CLOUD_PATH, serve_in_process
+
+
+async def _bench_mode(
+    mode: str,
+    address: str,
+    session: aiohttp.ClientSession,
+    polls: int,
+    commands: int,
+) -> dict[str, Any]:
+    api = WiNetClient(
+        mode=mode,
+        host=address,
+        stove_id="bench",
+        session=session,
+        command_gap=0,
+        command_debounce=0,
+        cloud_base=f"http://{address}{CLOUD_PATH}",
+    )
+
+    latencies: list[float] = []
+    errors = 0
+    cpu_start = time.process_time()
+    for _ in range(polls):
+        start = time.perf_counter()
+        try:
+            await api.get_all()
+        except WiNetApiError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+    cpu_per_poll = (time.process_time() - cpu_start) / polls if polls else None
+
+    cmd_start = time.perf_counter()
+    cmd_errors = 0
+    for i in range(commands):
+        try:
+            await api.commands.async_write(PARAM_POWER, 1 + i % 5)
+        except WiNetApiError:
+            cmd_errors += 1
+    cmd_elapsed = time.perf_counter() - cmd_start
+    await api.async_close()
+
+    def ms(value: float | None) -> float | None:
+        return None if value is None else round(value * 1000, 2)
+
+    return {
+        "mode": mode,
+        "polls": polls,
+        "poll_errors": errors,
+        "poll_p50_ms": ms(percentile(latencies, 50)),
+        "poll_p95_ms": ms(percentile(latencies, 95)),
+        "poll_p99_ms": ms(percentile(latencies, 99)),
+        "loop_cpu_per_poll_ms": ms(cpu_per_poll),
+        "commands": commands,
+        "command_errors": cmd_errors,
+        "commands_per_s": round(commands / cmd_elapsed, 2) if cmd_elapsed > 0 else None,
+    }
+
+
+async def run(args: argparse.Namespace) -> list[dict[str, Any]]:
+    results = []
+    # spawn: il figlio non eredita il loop asyncio del padre
+    context = multiprocessing.get_context("spawn")
+    options = {
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "error_rate": args.error_rate,
+        "serial": not args.parallel,
+        "seed": args.seed,
+    }
+    for mode in args.modes:
+        # emulatore nuovo per ogni modalità: stato e contatori indipendenti
+        conn, child_conn = context.Pipe()
+        process = context.Process(target=serve_in_process, args=(child_conn, options), daemon=True)
+        process.start()
+        try:
+            address = await asyncio.to_thread(conn.recv)
+            async with aiohttp.ClientSession() as session:
+                result = await _bench_mode(mode, address, session, args.polls, args.commands)
+            conn.send("stop")
+            counters = await asyncio.to_thread(conn.recv)
+        finally:
+            await asyncio.to_thread(process.join, 5)
+            if process.is_alive():
+                process.terminate()
+            conn.close()
+        result["emulator_requests"] = counters["requests"]
+        results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", nargs="+", default=[MODE_LOCAL, MODE_CLOUD],
+                        choices=[MODE_LOCAL, MODE_CLOUD])
+    parser.add_argument("--polls", type=int, default=100)
+    parser.add_argument("--commands", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--parallel", action="store_true", help="emulatore non seriale")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        print(f"[{result['mode']}]")
+        for key, value in result.items():
+            if key != "mode":
+                print(f"  {key:<22} {value}")
+
+
+if __name__ == "__main__":
+    main()
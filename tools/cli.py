@@ -0,0 +1,346 @@
+"""Riga di comando per leggere, comandare, stressare e registrare stufe WiNet.
+
+Uso:
+    python -m tools.cli read --host 192.168.1.50
+    python -m tools.cli poll --host 192.168.1.50 --interval 2 --count 30 --capture stufa.jsonl
+    python -m tools.cli load --host 192.168.1.50 192.168.1.51 --rate 0.5 1 2 --duration 60
+    python -m tools.cli set --host 192.168.1.50 power 3
+    python -m tools.cli load --emulator 4 --rate 5 10 20 --duration 10
+
+Con ``--mode cloud`` si passano gli ``--stove-id`` al posto degli host.
+``--capture`` registra i payload nel formato di ``tools.replay``.
+``--fields`` limita la lettura ai campi indicati, come fa l'integrazione con
+le entità disabilitate (in cloud si chiamano solo i relativi endpoint).
+``--emulator N`` avvia N emulatori locali (``tools.emulator``) e li usa come
+bersagli. ``load`` prova ogni frequenza di ``--rate`` (poll al secondo per
+stufa) e riporta i percentili di latenza e la frequenza massima sostenuta
+senza errori: è il dato da cui ricavare ``scan_interval``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import sys
+import time
+from typing import Any
+
+import aiohttp
+
+from pywinet.breaker import CircuitBreaker
+from pywinet.capture import PayloadRecorder
+from pywinet.const import MODE_LOCAL, MODE_CLOUD
+from pywinet.metrics import percentile
+from pywinet.protocol import WiNetApiError, WiNetClient
+from pywinet.snapshot import FIELDS
+
+from .emulator import CLOUD_PATH, WiNetEmulator
+
+# i payload catturati vanno su file a blocchi, non a ogni poll
+CAPTURE_FLUSH_EVERY = 100
+
+# una frequenza è "sostenuta" se si raggiunge almeno questa frazione del richiesto
+SUSTAINED_RATIO = 0.95
+
+
+def _ms(value: float | None) -> float | None:
+    return None if value is None else round(value * 1000, 1)
+
+
+def _summary(latencies: list[float], errors: int) -> dict[str, Any]:
+    return {
+        "ok": len(latencies),
+        "errors": errors,
+        "p50_ms": _ms(percentile(latencies, 50)),
+        "p95_ms": _ms(percentile(latencies, 95)),
+        "p99_ms": _ms(percentile(latencies, 99)),
+        "max_ms": _ms(max(latencies, default=None)),
+    }
+
+
+class Target:
+    """A stove under test with the client driving it."""
+
+    def __init__(self, name: str, client: WiNetClient, capture: PayloadRecorder | None) -> None:
+        self.name = name
+        self.client = client
+        self.capture = capture
+
+    async def poll(self, shared: bool = True) -> tuple[float, Any]:
+        start = time.perf_counter()
+        try:
+            snapshot = await self.client.get_all(shared=shared)
+        except WiNetApiError as err:
+            if self.capture is not None:
+                self.capture.record_error(self.client.transport, err)
+            raise
+        latency = time.perf_counter() - start
+        if self.capture is not None:
+            self.capture.record_poll(snapshot.mode, snapshot.raw, latency, source=self.name)
+            if self.capture.records % CAPTURE_FLUSH_EVERY == 0:
+                self.capture.flush()
+        return latency, snapshot
+
+
+def _targets(
+    args: argparse.Namespace,
+    session: aiohttp.ClientSession,
+    emulators: list[str],
+    capture: PayloadRecorder | None,
+) -> list[Target]:
+    common: dict[str, Any] = {
+        "mode": args.mode,
+        "session": session,
+        "keep_raw": capture is not None,
+        "command_gap": 0,
+        "command_debounce": 0,
+    }
+    if emulators:
+        specs = [
+            {"host": address, "stove_id": f"emu{i}", "cloud_base": f"http://{address}{CLOUD_PATH}"}
+            for i, address in enumerate(emulators)
+        ]
+    elif args.mode == MODE_CLOUD:
+        specs = [{"stove_id": stove_id} for stove_id in args.stove_id or ()]
+        if args.cloud_base:
+            for spec in specs:
+                spec["cloud_base"] = args.cloud_base
+    else:
+        specs = [{"host": host} for host in args.host or ()]
+
+    if not specs:
+        raise SystemExit("Indicare --host, --stove-id oppure --emulator")
+
+    targets = []
+    for spec in specs:
+        client = WiNetClient(**common, **spec)
+        if args.fields:
+            client.wanted_fields = frozenset(args.fields)
+        if not args.breaker:
+            # per misurare la stufa ogni richiesta deve arrivarle davvero
+            client.breakers = {
+                MODE_LOCAL: CircuitBreaker(failure_threshold=sys.maxsize),
+                MODE_CLOUD: CircuitBreaker(failure_threshold=sys.maxsize),
+            }
+        name = spec["stove_id"] if args.mode == MODE_CLOUD else spec["host"]
+        targets.append(Target(name, client, capture))
+    return targets
+
+
+async def _cmd_read(args: argparse.Namespace, targets: list[Target]) -> int:
+    failed = 0
+    for target in targets:
+        try:
+            latency, snapshot = await target.poll()
+        except WiNetApiError as err:
+            print(f"{target.name}: errore: {err}", file=sys.stderr)
+            failed += 1
+            continue
+        data = snapshot.as_dict()
+        data["latency_ms"] = _ms(latency)
+        if args.json:
+            print(json.dumps({"target": target.name, **data}, ensure_ascii=False))
+        else:
+            print(f"[{target.name}]")
+            for key, value in data.items():
+                print(f"  {key:<14} {value}")
+    return 1 if failed else 0
+
+
+async def _cmd_poll(args: argparse.Namespace, targets: list[Target]) -> int:
+    target = targets[0]
+    latencies: list[float] = []
+    errors = 0
+    start = time.monotonic()
+    n = 0
+    try:
+        while not args.count or n < args.count:
+            due = start + n * args.interval
+            await asyncio.sleep(max(0.0, due - time.monotonic()))
+            n += 1
+            try:
+                latency, snapshot = await target.poll()
+            except WiNetApiError as err:
+                errors += 1
+                print(f"{time.strftime('%H:%M:%S')} errore: {err}")
+                continue
+            latencies.append(latency)
+            stale = f" stale={sorted(snapshot.stale)}" if snapshot.stale else ""
+            print(
+                f"{time.strftime('%H:%M:%S')} {_ms(latency):>7} ms  {snapshot.state}"
+                f"  air={snapshot.air} set={snapshot.setAir} power={snapshot.power}{stale}"
+            )
+    finally:
+        result = _summary(latencies, errors)
+        print(json.dumps(result) if args.json else f"-- {result}")
+    return 0
+
+
+async def _load_target(target: Target, rate: float, duration: float, workers: int) -> dict[str, Any]:
+    latencies: list[float] = []
+    errors = 0
+    period = workers / rate
+    start = time.monotonic()
+    deadline = start + duration
+
+    async def _worker(offset: float) -> None:
+        nonlocal errors
+        n = 0
+        while True:
+            due = start + offset + n * period
+            # in ritardo sul programma: le richieste perse abbassano la frequenza ottenuta
+            if due >= deadline or time.monotonic() >= deadline:
+                return
+            await asyncio.sleep(max(0.0, due - time.monotonic()))
+            n += 1
+            try:
+                # senza single-flight: i worker concorrenti non si accodano a una
+                # lettura già in corso, ogni poll contato è una richiesta vera
+                latency, _snapshot = await target.poll(shared=False)
+            except WiNetApiError:
+                errors += 1
+            else:
+                latencies.append(latency)
+
+    await asyncio.gather(*(_worker(i * period / workers) for i in range(workers)))
+    achieved = len(latencies) / duration
+    return {
+        "target": target.name,
+        "rate": rate,
+        "achieved_rate": round(achieved, 3),
+        "sustained": errors == 0 and achieved >= rate * SUSTAINED_RATIO,
+        **_summary(latencies, errors),
+    }
+
+
+async def _cmd_load(args: argparse.Namespace, targets: list[Target]) -> int:
+    results: list[dict[str, Any]] = []
+    best: dict[str, float | None] = {target.name: None for target in targets}
+    for rate in sorted(args.rate):
+        step = await asyncio.gather(
+            *(_load_target(target, rate, args.duration, args.workers) for target in targets)
+        )
+        for result in step:
+            if result["sustained"]:
+                best[result["target"]] = rate
+            if not args.json:
+                print(
+                    f"{result['target']:<22} {rate:>6}/s  ok={result['ok']:<5} "
+                    f"err={result['errors']:<4} {result['achieved_rate']:>7}/s  "
+                    f"p50={result['p50_ms']} p95={result['p95_ms']} p99={result['p99_ms']} ms"
+                    f"{'' if result['sustained'] else '  NON sostenuta'}"
+                )
+        results.extend(step)
+
+    if args.json:
+        print(json.dumps({"results": results, "max_sustained_rate": best}, indent=2))
+    else:
+        for name, rate in best.items():
+            hint = f"scan_interval >= {1 / rate:.1f}s" if rate else "nessuna frequenza sostenuta"
+            print(f"{name}: {rate or '-'} poll/s sostenuti ({hint})")
+    return 0
+
+
+async def _cmd_set(args: argparse.Namespace, targets: list[Target]) -> int:
+    for target in targets:
+        client = target.client
+        try:
+            if args.param == "status":
+                if args.value not in ("on", "off"):
+                    raise SystemExit("status: usare on oppure off")
+                await (client.ignite() if args.value == "on" else client.shutdown())
+            elif args.param == "power":
+                await client.set_power(int(args.value))
+            elif args.param == "air":
+                await client.set_air_temperature(float(args.value))
+            else:
+                await client.set_water_temperature(float(args.value))
+        except WiNetApiError as err:
+            print(f"{target.name}: errore: {err}", file=sys.stderr)
+            return 1
+        print(f"{target.name}: {args.param} = {args.value}")
+    return 0
+
+
+COMMANDS = {
+    "read": _cmd_read,
+    "poll": _cmd_poll,
+    "load": _cmd_load,
+    "set": _cmd_set,
+}
+
+
+async def run(args: argparse.Namespace) -> int:
+    emulators: list[WiNetEmulator] = []
+    path = getattr(args, "capture", None)
+    # niente rotazione: una cattura da CLI resta in un solo file
+    capture = PayloadRecorder(path, max_bytes=sys.maxsize) if path else None
+    try:
+        addresses = []
+        for i in range(args.emulator):
+            emulator = WiNetEmulator(latency=args.emulator_latency, seed=i)
+            emulators.append(emulator)
+            addresses.append(await emulator.start())
+
+        async with aiohttp.ClientSession() as session:
+            targets = _targets(args, session, addresses, capture)
+            try:
+                return await COMMANDS[args.command](args, targets)
+            finally:
+                for target in targets:
+                    await target.client.async_close()
+    finally:
+        for emulator in emulators:
+            await emulator.stop()
+        if capture is not None:
+            capture.flush()
+
+
+def main() -> None:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--mode", choices=[MODE_LOCAL, MODE_CLOUD], default=MODE_LOCAL)
+    common.add_argument("--host", nargs="+", help="IP/host dei moduli locali")
+    common.add_argument("--stove-id", nargs="+", help="stove_id per la modalità cloud")
+    common.add_argument("--cloud-base", help="URL base cloud alternativo")
+    common.add_argument("--emulator", type=int, default=0, metavar="N",
+                        help="avvia N emulatori e usali come bersagli")
+    common.add_argument("--emulator-latency", type=float, default=0.05)
+    common.add_argument("--breaker", action="store_true",
+                        help="lascia attivo il circuit breaker del client")
+    common.add_argument("--fields", nargs="+", choices=FIELDS,
+                        help="legge solo questi campi (come con entità disabilitate)")
+    common.add_argument("--json", action="store_true")
+
+    capture = argparse.ArgumentParser(add_help=False)
+    capture.add_argument("--capture", metavar="FILE", help="accoda i payload grezzi (JSONL)")
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("read", parents=[common, capture], help="lettura singola")
+
+    poll = sub.add_parser("poll", parents=[common, capture], help="polling continuo")
+    poll.add_argument("--interval", type=float, default=5.0, help="secondi tra due poll")
+    poll.add_argument("--count", type=int, default=0, help="numero di poll (0 = infinito)")
+
+    load = sub.add_parser("load", parents=[common, capture], help="test di carico")
+    load.add_argument("--rate", type=float, nargs="+", default=[1.0],
+                      help="poll al secondo per stufa (più valori = rampa)")
+    load.add_argument("--duration", type=float, default=30.0, help="secondi per frequenza")
+    load.add_argument("--workers", type=int, default=1,
+                      help="richieste contemporanee per stufa")
+
+    cmd = sub.add_parser("set", parents=[common], help="invia un comando")
+    cmd.add_argument("param", choices=["status", "power", "air", "water"])
+    cmd.add_argument("value")
+
+    args = parser.parse_args()
+    if args.command == "load" and (min(args.rate) <= 0 or args.workers < 1):
+        parser.error("--rate deve essere > 0 e --workers >= 1")
+    with contextlib.suppress(KeyboardInterrupt):
+        sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Emulatore aiohttp di una stufa WiNet (API locale e cloud).
+
+Uso:
+    python -m tools.emulator --port 8080 --latency 0.2 --jitter 0.05 --error-rate 0.02
+
+L'API locale risponde su ``http://127.0.0.1:<port>/api/...``; quella cloud su
+``http://127.0.0.1:<port>/WiNetStove.svc/json/...`` (passare questo URL come
+``cloud_base`` a ``WiNetApi``).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+
+from aiohttp import web
+
+CLOUD_PATH = "/WiNetStove.svc/json"
+
+
+@dataclass
+class StoveState:
+    """Stato della stufa emulata; temperature in mezzi gradi come sul modulo locale."""
+
+    on: bool = False
+    power: int = 3
+    air: int = 42
+    set_air: int = 42
+    water: int = 120
+    set_water: int = 130
+    gasflue: float = 25.0
+    rpm: int = 0
+
+    @property
+    def local_status(self) -> int:
+        return 1 if self.on else 0
+
+    @property
+    def cloud_status(self) -> int:
+        return 3 if self.on else 0
+
+    def as_global(self) -> dict:
+        return {
+            "status": self.local_status,
+            "description": "ACCESO" if self.on else "SPENTO",
+            "power": self.power,
+            "air": self.air,
+            "setAir": self.set_air,
+            "water": self.water,
+            "setWater": self.set_water,
+            "gasflue": self.gasflue if self.on else 25.0,
+            "rpmExtractor": 1200 + 150 * self.power if self.on else 0,
+        }
+
+
+class WiNetEmulator:
+    """Emulated stove with configurable latency, jitter and error rate.
+
+    With ``serial`` (the default) requests are served one at a time, like
+    the embedded HTTP server of the WiNet module.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        serial: bool = True,
+        seed: int | None = None,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.serial = serial
+        self.state = StoveState()
+        self.requests = 0
+        self.errors = 0
+        self._lock = asyncio.Lock()
+        self._random = random.Random(seed)
+        self._runner: web.AppRunner | None = None
+
+        self.app = web.Application(middlewares=[self._middleware])
+        self.app.router.add_get("/api/global", self._global)
+        self.app.router.add_get("/api/status/{value}", self._local_status)
+        self.app.router.add_get("/api/power/{value}", self._local_power)
+        self.app.router.add_get("/api/temperature/{which}/{value}", self._local_temperature)
+        self.app.router.add_get(CLOUD_PATH + "/{op}/{arg}", self._cloud)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return ``host:port``."""
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        bound = self._runner.addresses[0]
+        return f"{bound[0]}:{bound[1]}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        if self.serial:
+            async with self._lock:
+                return await self._serve(request, handler)
+        return await self._serve(request, handler)
+
+    async def _serve(self, request: web.Request, handler):
+        self.requests += 1
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self._random.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=500, text="emulated error")
+        return await handler(request)
+
+    # --- API locale ---
+
+    async def _global(self, request: web.Request) -> web.Response:
+        return web.json_response(self.state.as_global())
+
+    async def _local_status(self, request: web.Request) -> web.Response:
+        self.state.on = request.match_info["value"] == "1"
+        return web.json_response({"result": "ok"})
+
+    async def _local_power(self, request: web.Request) -> web.Response:
+        self.state.power = int(request.match_info["value"])
+        return web.json_response({"result": "ok"})
+
+    async def _local_temperature(self, request: web.Request) -> web.Response:
+        value = int(request.match_info["value"])
+        if request.match_info["which"] == "water":
+            self.state.set_water = value
+        else:
+            self.state.set_air = value
+        return web.json_response({"result": "ok"})
+
+    # --- API cloud (temperature in °C) ---
+
+    async def _cloud(self, request: web.Request) -> web.Response:
+        op = request.match_info["op"]
+        _stove_id, _, value = request.match_info["arg"].partition(";")
+        state = self.state
+
+        if op == "GetStatus":
+            return web.json_response({"Status": state.cloud_status})
+        if op == "GetPower":
+            return web.json_response({"Result": state.power})
+        if op == "GetActualTemperature":
+            return web.json_response({"Result": state.air / 2})
+        if op == "GetTemperature":
+            return web.json_response({"Result": state.set_air / 2})
+        if op == "Ignit":
+            state.on = True
+        elif op == "Shutdown":
+            state.on = False
+        elif op == "SetPower":
+            state.power = int(value)
+        elif op == "SetTemperature":
+            state.set_air = int(round(float(value) * 2))
+        else:
+            raise web.HTTPNotFound()
+        return web.json_response({"Result": True})
+
+
+async def _serve_forever(args: argparse.Namespace) -> None:
+    emulator = WiNetEmulator(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        serial=not args.parallel,
+    )
+    address = await emulator.start(args.host, args.port)
+    print(f"WiNet emulator on http://{address} (cloud: http://{address}{CLOUD_PATH})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await emulator.stop()
+
+
+async def _serve_until_stopped(conn: Connection, options: dict) -> None:
+    emulator = WiNetEmulator(**options)
+    conn.send(await emulator.start())
+    try:
+        # il processo padre manda un messaggio qualsiasi per fermare il server
+        await asyncio.get_running_loop().run_in_executor(None, conn.recv)
+    finally:
+        await emulator.stop()
+    conn.send({"requests": emulator.requests, "errors": emulator.errors})
+
+
+def serve_in_process(conn: Connection, options: dict) -> None:
+    """Child-process entry point: send ``host:port``, serve until told to stop.
+
+    On stop the request counters are sent back on ``conn``. Used by the
+    benchmark so the server's CPU time is not charged to the client.
+    """
+    asyncio.run(_serve_until_stopped(conn, options))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.05, help="secondi per richiesta")
+    parser.add_argument("--jitter", type=float, default=0.0, help="± secondi")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="frazione di HTTP 500")
+    parser.add_argument("--parallel", action="store_true", help="serve richieste in parallelo")
+    try:
+        asyncio.run(_serve_forever(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Riproduce una registrazione di payload WiNet attraverso il decoder.
+
+Uso:
+    python -m tools.replay config/winet_recordings/<entry_id>.jsonl
+    python -m tools.replay stufa.jsonl --speed 60 --output normalizzati.jsonl
+    python -m tools.replay stufa.jsonl --repeat 20 --json
+
+Legge i file ruotati in ordine (``.3`` … ``.1``, poi il file corrente), decodifica
+ogni poll come fa ``WiNetClient`` e applica il rilevamento dei cambiamenti
+delle entità (deadband compresi). Riporta il throughput di decodifica, gli
+aggiornamenti di stato per campo, i comandi e le anomalie del firmware
+(valori ``---``, fumi sotto soglia, stati sconosciuti). ``--speed 0`` (default)
+va alla massima velocità, ``--speed N`` a N volte il tempo reale. Con
+``--output`` scrive gli snapshot normalizzati, da confrontare fra versioni
+del parser.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from collections import Counter
+from typing import Any, TextIO
+
+from pywinet.capture import KIND_COMMAND, KIND_ERROR, KIND_POLL, read_recording
+from pywinet.const import FIELD_DEADBANDS, MODE_CLOUD
+from pywinet.snapshot import (
+    CLOUD_TABLE,
+    FLUE_FLOOR,
+    LOCAL_TABLE,
+    FieldTracker,
+    WiNetSnapshot,
+    decode_cloud_field,
+    decode_local,
+    number,
+)
+
+
+class Replay:
+    """Decoder and entity change detection fed from a recording."""
+
+    def __init__(self, output: TextIO | None = None) -> None:
+        self.output = output
+        self.polls = 0
+        self.errors = 0
+        self.no_raw = 0
+        self.decode_time = 0.0
+        self.updates: Counter[str] = Counter()
+        self.commands: Counter[str] = Counter()
+        self.anomalies: Counter[str] = Counter()
+        self._tracker = FieldTracker(FIELD_DEADBANDS)
+        self._last_cloud: dict[str, Any] = {}
+
+    def feed(self, record: dict[str, Any]) -> None:
+        kind = record.get("k")
+        if kind == KIND_POLL:
+            self._poll(record)
+        elif kind == KIND_ERROR:
+            self.errors += 1
+        elif kind == KIND_COMMAND:
+            self.commands[f"{record.get('p')} {'ok' if record.get('ok') else 'err'}"] += 1
+
+    def _decode(self, mode: str, raw: dict[str, Any]) -> WiNetSnapshot:
+        if mode != MODE_CLOUD:
+            return decode_local(raw)
+        # come il client: i campi non riletti (TTL) restano all'ultimo valore
+        for name, payload in raw.items():
+            if name in CLOUD_TABLE and isinstance(payload, dict):
+                self._last_cloud[name] = decode_cloud_field(name, payload)
+        return WiNetSnapshot(MODE_CLOUD, self._last_cloud)
+
+    def _poll(self, record: dict[str, Any]) -> None:
+        raw = record.get("raw")
+        if not isinstance(raw, dict):
+            self.no_raw += 1
+            return
+
+        start = time.perf_counter()
+        snapshot = self._decode(record.get("m", ""), raw)
+        changed = self._tracker.diff(snapshot)
+        if changed is None:
+            # prima lettura o cambio di trasporto: tutte le entità si aggiornano
+            changed = set(snapshot.values())
+        self.decode_time += time.perf_counter() - start
+
+        self.polls += 1
+        self.updates.update(changed)
+        self._check(snapshot, raw)
+        if self.output is not None:
+            data = snapshot.as_dict()
+            data["t"] = record.get("t")
+            self.output.write(json.dumps(data, ensure_ascii=False) + "\n")
+
+    def _check(self, snapshot: WiNetSnapshot, raw: dict[str, Any]) -> None:
+        if snapshot.state is not None and snapshot.state.startswith("UNKNOWN"):
+            self.anomalies[f"status {snapshot.status}"] += 1
+        if snapshot.mode == MODE_CLOUD:
+            return
+        for name, (key, _conv) in LOCAL_TABLE.items():
+            value = raw.get(key)
+            if isinstance(value, str) and value.strip() in ("", "---"):
+                self.anomalies[f"{name} '{value.strip()}'"] += 1
+        gasflue = number(raw.get(LOCAL_TABLE["gasflue"][0]))
+        if gasflue is not None and gasflue <= FLUE_FLOOR:
+            self.anomalies[f"gasflue <= {FLUE_FLOOR}"] += 1
+
+    def report(self, elapsed: float) -> dict[str, Any]:
+        return {
+            "polls": self.polls,
+            "poll_errors": self.errors,
+            "polls_without_raw": self.no_raw,
+            "decode_polls_per_s": round(self.polls / self.decode_time) if self.decode_time else None,
+            "wall_s": round(elapsed, 3),
+            "state_updates": dict(self.updates.most_common()),
+            "commands": dict(self.commands.most_common()),
+            "anomalies": dict(self.anomalies.most_common()),
+        }
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    output = open(args.output, "w", encoding="utf-8") if args.output else None
+    replay = Replay(output)
+    start = time.perf_counter()
+    try:
+        for _ in range(args.repeat):
+            previous: float | None = None
+            for record in read_recording(args.recording):
+                ts = record.get("t")
+                if args.speed > 0 and previous is not None and isinstance(ts, (int, float)):
+                    time.sleep(max(0.0, (ts - previous) / args.speed))
+                if isinstance(ts, (int, float)):
+                    previous = ts
+                replay.feed(record)
+    finally:
+        if output is not None:
+            output.close()
+    return replay.report(time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording", help="file JSONL registrato (senza suffisso di rotazione)")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="multiplo del tempo reale (0 = massima velocità)")
+    parser.add_argument("--repeat", type=int, default=1, help="ripete la registrazione N volte")
+    parser.add_argument("--output", metavar="FILE", help="scrive gli snapshot normalizzati (JSONL)")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    result = run(args)
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        return
+    for key, value in result.items():
+        print(f"{key:<20} {value}")
+
+
+if __name__ == "__main__":
+    main()